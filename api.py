@@ -0,0 +1,203 @@
+from datetime import datetime
+from hashlib import sha1
+from flask import Blueprint, Response, abort, current_app, jsonify, request, url_for
+from models import db, Venue, Artist, Show
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+VENUE_COLUMNS = [
+    'id', 'name', 'city', 'state', 'address', 'phone', 'image_link', 'website',
+    'facebook_link', 'genres', 'seeking_talent', 'seeking_description', 'version'
+]
+ARTIST_COLUMNS = [
+    'id', 'name', 'city', 'state', 'phone', 'image_link', 'website',
+    'facebook_link', 'genres', 'seeking_venue', 'seeking_description', 'version'
+]
+
+
+# table columns by name, selected as plain row tuples
+def get_columns(model, names):
+    return [model.__table__.c[name] for name in names]
+
+
+# venue/artist row tuple to dict
+def get_row_dict(row):
+    data = row._asdict()
+    data['genres'] = data['genres'].split(',')
+    return data
+
+
+# strong etag of the row versions a response is built from
+def get_etag(*parts):
+    return sha1(repr(parts).encode()).hexdigest()
+
+
+# 304 when the client has the etag, the body is only built otherwise
+def conditional_json(etag, get_data):
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(get_data())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def get_limit():
+    limit = request.args.get(
+        'limit', current_app.config['API_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+
+#  Venues & Artists
+#  ----------------------------------------------------------------
+
+# keyset paginated list on id
+def list_rows(model, names, endpoint):
+    after = request.args.get('after', 0, type=int)
+    limit = get_limit()
+
+    rows = db.session.query(*get_columns(model, names)).filter(
+        model.id > after).order_by(model.id).limit(limit).all()
+
+    def get_data():
+        data = {"data": [get_row_dict(row) for row in rows]}
+        if len(rows) == limit:
+            data['next'] = url_for(endpoint, after=rows[-1].id, limit=limit)
+        return data
+
+    return conditional_json(
+        get_etag(limit, [(row.id, row.version) for row in rows]), get_data)
+
+
+# row with its shows & their counterpart
+def get_detail(model, names, show_fk, other, other_fk, other_key, id):
+    row = db.session.query(*get_columns(model, names)).filter(
+        model.id == id).first()
+    if row is None:
+        abort(404)
+
+    shows = db.session.query(
+        Show.id,
+        Show.version,
+        Show.start_time,
+        other.id.label('other_id'),
+        other.name.label('other_name'),
+        other.image_link.label('other_image_link'),
+        other.version.label('other_version')
+    ).join(other, other.id == other_fk).filter(
+        show_fk == id).order_by(Show.start_time, Show.id).all()
+
+    def get_data():
+        data = get_row_dict(row)
+        data['shows'] = [{
+            "id": show.id,
+            "start_time": show.start_time.isoformat(),
+            other_key + "_id": show.other_id,
+            other_key + "_name": show.other_name,
+            other_key + "_image_link": show.other_image_link
+        } for show in shows]
+        return data
+
+    return conditional_json(get_etag(
+        row.version,
+        [(show.id, show.version, show.other_id, show.other_version) for show in shows]
+    ), get_data)
+
+
+@api.route('/venues')
+def venues():
+    return list_rows(Venue, VENUE_COLUMNS, 'api.venues')
+
+
+@api.route('/venues/<int:venue_id>')
+def venue(venue_id):
+    return get_detail(Venue, VENUE_COLUMNS, Show.venue_id,
+                      Artist, Show.artist_id, 'artist', venue_id)
+
+
+@api.route('/artists')
+def artists():
+    return list_rows(Artist, ARTIST_COLUMNS, 'api.artists')
+
+
+@api.route('/artists/<int:artist_id>')
+def artist(artist_id):
+    return get_detail(Artist, ARTIST_COLUMNS, Show.artist_id,
+                      Venue, Show.venue_id, 'venue', artist_id)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+# show row with venue & artist names
+def get_show_query():
+    return db.session.query(
+        Show.id,
+        Show.version,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.version.label('venue_version'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Artist.version.label('artist_version')
+    ).join(Venue, Venue.id == Show.venue_id).join(Artist, Artist.id == Show.artist_id)
+
+
+def get_show_dict(show):
+    return {
+        "id": show.id,
+        "start_time": show.start_time.isoformat(),
+        "venue_id": show.venue_id,
+        "venue_name": show.venue_name,
+        "artist_id": show.artist_id,
+        "artist_name": show.artist_name,
+        "artist_image_link": show.artist_image_link
+    }
+
+
+def get_show_versions(show):
+    return (show.id, show.version, show.venue_version, show.artist_version)
+
+
+# keyset paginated on (start_time, id), upcoming shows first
+@api.route('/shows')
+def shows():
+    limit = get_limit()
+    try:
+        after = request.args.get('after')
+        after = Show.decode_cursor(after) if after else (
+            datetime.now(), Show.MAX_ID)
+    except ValueError:
+        abort(400)
+
+    rows = get_show_query().filter(
+        db.tuple_(Show.start_time, Show.id) > after
+    ).order_by(Show.start_time, Show.id).limit(limit).all()
+
+    def get_data():
+        data = {"data": [get_show_dict(row) for row in rows]}
+        if len(rows) == limit:
+            data['next'] = url_for('api.shows', limit=limit, after=Show.encode_cursor(
+                (rows[-1].start_time, rows[-1].id)))
+        return data
+
+    return conditional_json(
+        get_etag(limit, [get_show_versions(row) for row in rows]), get_data)
+
+
+@api.route('/shows/<int:show_id>')
+def show(show_id):
+    row = get_show_query().filter(Show.id == show_id).first()
+    if row is None:
+        abort(404)
+
+    return conditional_json(get_etag(get_show_versions(row)), lambda: get_show_dict(row))
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def error(error):
+    return jsonify({"error": error.code, "message": error.description}), error.code
@@ -2,123 +2,183 @@
 # Imports
 #----------------------------------------------------------------------------#
 
-import dateutil.parser
-import babel
-import sys
+import click
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta
 from flask import (
+    Blueprint,
     Flask,
+    current_app,
     render_template,
     request,
     flash,
     redirect,
     url_for,
     abort,
-    jsonify
+    jsonify,
+    Response,
+    stream_with_context
 )
 from flask_moment import Moment
-from flask_migrate import Migrate
+from sqlalchemy.orm.exc import StaleDataError
 import logging
 from logging import Formatter, FileHandler
-from forms import VenueForm, ArtistForm, ShowForm
+# forms, babel & dateutil are imported by the views & filters that use them
+# to keep them out of worker startup
 from models import db, Venue, Artist, Show
+import search
+import autocomplete
+from cache import page_cache
+from metrics import metrics
+from api import api
+import importer
+import exporter
+import counters
+import partitions
+import similarity
+from assets import assets
+import templating
+from routing import replica_router
+from transaction import Transaction
+from pool import pool_monitor
 
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db.init_app(app)
-migrate = Migrate(app, db)
+moment = Moment()
+# page views, registered on the app by create_app
+main = Blueprint('main', __name__)
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
+# compiled babel pattern & parsed locale, per (format, locale)
+@lru_cache(maxsize=64)
+def get_datetime_pattern(format, locale):
+    import babel.dates
+    return babel.dates.parse_pattern(format), babel.Locale.parse(locale)
+
+
+# babel & dateutil are loaded on the first formatted date
+@main.app_template_filter('datetime')
+def format_datetime(value, format='medium', locale=None):
+    import babel.dates
+    # views pass datetime objects, strings are still accepted
+    if isinstance(value, str):
+        import dateutil.parser
+        value = dateutil.parser.parse(value)
     if format == 'full':
         format = "EEEE MMMM, d, y 'at' h:mma"
     elif format == 'medium':
         format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
-
+    elif format in ('long', 'short'):
+        # babel named formats
+        return babel.dates.format_datetime(value, format, locale=locale or babel.dates.LC_TIME)
+    pattern, locale = get_datetime_pattern(format, locale or babel.dates.LC_TIME)
+    return pattern.apply(value, locale)
 
-app.jinja_env.filters['datetime'] = format_datetime
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
 
-@app.route('/')
+@main.route('/')
 def index():
     return render_template('pages/home.html')
 
 
+#  Time range
+#  ----------------------------------------------------------------
+
+# optional from & to query args as ISO dates/times, raises ValueError,
+# the range ends before to, or after the whole day when to is a date
+def get_time_range():
+    start = request.args.get('from')
+    end = request.args.get('to')
+    if end:
+        try:
+            end = datetime.combine(date.fromisoformat(end), time()) + timedelta(days=1)
+        except ValueError:
+            end = datetime.fromisoformat(end)
+    return (
+        datetime.fromisoformat(start) if start else None,
+        end or None
+    )
+
+
+#  Search
+#  ----------------------------------------------------------------
+
+# page & page size of search form, page size capped by config
+def get_search_page():
+    page = max(1, request.form.get('page', 1, type=int))
+    per_page = request.form.get(
+        'per_page', current_app.config['SEARCH_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['SEARCH_MAX_PER_PAGE']))
+    return page, per_page
+
+
+#  Autocomplete
+#  ----------------------------------------------------------------
+
+@main.route('/api/autocomplete')
+def autocomplete_names():
+    index = autocomplete.indexes.get(request.args.get('type', ''))
+    if index is None:
+        abort(400)
+
+    limit = max(1, min(request.args.get('limit', 10, type=int),
+                       current_app.config['AUTOCOMPLETE_MAX_LIMIT']))
+
+    # in-memory lookup, built on first use
+    index.ensure_built(current_app.config['AUTOCOMPLETE_REFRESH_SECONDS'])
+    return jsonify({"data": index.lookup(request.args.get('q', ''), limit)})
+
+
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@main.route('/venues')
+@page_cache.cached('venues')
 def venues():
-    # get areas
-    areas = Venue.query.with_entities(
-        Venue.city, Venue.state).group_by(Venue.city, Venue.state).all()
+    from forms import GENRES
+    # optional genre filter
+    genre = request.args.get('genre', '')
 
-    # final data for the template
-    data = []
-    for area in areas:
-        # venues data for this area
-        area_data = []
-        venues = Venue.query.filter(
-            Venue.city == area[0], Venue.state == area[1]).all()
-        for venue in venues:
-            area_data.append({
-                "id": venue.id,
-                "name": venue.name,
-                "num_upcoming_shows": len(venue.get_upcoming_shows())
-            })
-        # add area city, state & venues data to final data
-        data.append({
-            "city": area[0],
-            "state": area[1],
-            "venues": area_data
-        })
+    # areas with their venues & upcoming shows count
+    data = Venue.get_areas(genre=genre)
 
-    return render_template('pages/venues.html', areas=data)
+    return render_template('pages/venues.html', areas=data, genres=GENRES, genre=genre)
 
 
-@app.route('/venues/search', methods=['POST'])
+@main.route('/venues/search', methods=['POST'])
+@replica_router.read_only
 def search_venues():
     search_term = request.form.get('search_term', '')
+    page, per_page = get_search_page()
 
-    # case insensitive search
-    venues = Venue.query.filter(
-        Venue.name.ilike('%' + search_term + '%')).all()
+    # ranked & paginated case insensitive search
+    response = search.search_venues(search_term, page, per_page)
 
-    # prepare count and data of response
-    count = len(venues)
-    data = []
-    for venue in venues:
-        data.append({
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": len(venue.get_upcoming_shows())
-        })
-
-    response = {
-        "count": count,
-        "data": data
-    }
     return render_template('pages/search_venues.html', results=response, search_term=search_term)
 
 
-@app.route('/venues/<int:venue_id>')
+@main.route('/venues/<int:venue_id>')
+@page_cache.cached('venue:{venue_id}')
 def show_venue(venue_id):
+    from forms import ShowForm
+    # optional shows time range
+    try:
+        start, end = get_time_range()
+    except ValueError:
+        abort(400)
+
     # get by id
-    venue = Venue.query.get(venue_id)
+    venue = db.get_or_404(Venue, venue_id)
 
     # venue data
     data = venue.get_data()
@@ -129,23 +189,30 @@ def show_venue(venue_id):
             "artist_id": show.artist.id,
             "artist_name": show.artist.name,
             "artist_image_link": show.artist.image_link,
-            "start_time": show.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            "start_time": show.start_time
         }
 
+    # one "now" for both past and upcoming shows
+    now = datetime.now()
+
     # past_shows
-    past_shows = venue.get_past_shows()
+    past_shows = venue.get_past_shows(now, start, end)
     data['past_shows_count'] = len(past_shows)
     data['past_shows'] = []
     for show in past_shows:
         data['past_shows'].append(get_show_dict(show))
 
     # upcoming shows
-    upcoming_shows = venue.get_upcoming_shows()
+    upcoming_shows = venue.get_upcoming_shows(now, start, end)
     data['upcoming_shows_count'] = len(upcoming_shows)
     data['upcoming_shows'] = []
     for show in upcoming_shows:
         data['upcoming_shows'].append(get_show_dict(show))
 
+    # similar venues, from the neighbour table
+    data['similar_venues'] = [row._asdict() for row in venue.get_similar(
+        current_app.config['SIMILARITY_SHOWN'])]
+
     showForm = ShowForm()
     return render_template('pages/show_venue.html', venue=data, showForm=showForm)
 
@@ -153,34 +220,31 @@ def show_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route('/venues/create', methods=['GET'])
+@main.route('/venues/create', methods=['GET'])
 def create_venue_form():
+    from forms import VenueForm
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
 
-@app.route('/venues/create', methods=['POST'])
+@main.route('/venues/create', methods=['POST'])
 def create_venue_submission():
+    from forms import VenueForm
     # validate form
     form = VenueForm(request.form)
     if not form.validate():
         return render_template('forms/new_venue.html', form=form)
 
     # create venue
-    error = False
-    try:
+    with Transaction() as transaction:
         venue = Venue()
         venue.set_data(form_data=request.form)
         db.session.add(venue)
-        db.session.commit()
-    except:
-        error = True
-        db.session.rollback()
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-
-    if error:
+        transaction.on_commit(
+            lambda: autocomplete.venue_index.add(venue.id, venue.name))
+        transaction.on_commit(page_cache.invalidate, 'venues')
+
+    if transaction.failed:
         flash('An error occurred. Venue ' +
               request.form.get('name', '') + ' could not be listed.')
     else:
@@ -190,31 +254,44 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@main.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
-    error = False
-    try:
-        venue = Venue.query.get(venue_id)
-        db.session.delete(venue)
-        db.session.commit()
-    except():
-        db.session.rollback()
-        error = True
-    finally:
-        db.session.close()
-
-    if error:
+    with Transaction() as transaction:
+        # venues listing this one as similar, their rows go with it
+        similar_ids = Venue.get_similar_to_ids(venue_id)
+        artist_ids = Venue.delete_by_id(venue_id)
+        if artist_ids is None:
+            abort(404)
+        # shows deleted by the database skip the counter hooks
+        counters.rebuild_all(db.session.connection(),
+                             venue_ids=[], artist_ids=artist_ids)
+        transaction.on_commit(autocomplete.venue_index.remove, venue_id)
+        # artist pages listing this venue's shows & venue pages listing it
+        # as similar
+        transaction.on_commit(page_cache.invalidate, 'venues', 'venue:' + str(venue_id),
+                              *['artist:' + str(id) for id in artist_ids],
+                              *['venue:' + str(id) for id in similar_ids])
+
+    if transaction.failed:
         abort(500)
-    else:
-        return ''
+    return ''
 
 #  Artists
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists')
+@main.route('/artists')
+@page_cache.cached('artists')
 def artists():
-    artists = Artist.query.all()
+    from forms import GENRES
+    # optional genre filter
+    genre = request.args.get('genre', '')
+
+    artists = Artist.query.with_entities(Artist.id, Artist.name)
+    if genre:
+        artists = artists.filter(
+            Artist.id.in_(Artist.get_genre_ids_query(genre)))
+    artists = artists.order_by(Artist.id).all()
 
     # final data for the template
     data = []
@@ -224,32 +301,18 @@ def artists():
             "name": artist.name
         })
 
-    return render_template('pages/artists.html', artists=data)
+    return render_template('pages/artists.html', artists=data, genres=GENRES, genre=genre)
 
 
-@app.route('/artists/search', methods=['POST'])
+@main.route('/artists/search', methods=['POST'])
+@replica_router.read_only
 def search_artists():
     search_term = request.form.get('search_term', '')
     result_format = request.form.get('result_format', '')
+    page, per_page = get_search_page()
 
-    # case insensitive search
-    artists = Artist.query.filter(
-        Artist.name.ilike('%' + search_term + '%')).all()
-
-    # prepare count and data of response
-    count = len(artists)
-    data = []
-    for artist in artists:
-        data.append({
-            "id": artist.id,
-            "name": artist.name,
-            "num_upcoming_shows": len(artist.get_upcoming_shows())
-        })
-
-    response = {
-        "count": count,
-        "data": data
-    }
+    # ranked & paginated case insensitive search
+    response = search.search_artists(search_term, page, per_page)
 
     if result_format == 'json':
         return jsonify(response)
@@ -257,10 +320,11 @@ def search_artists():
     return render_template('pages/search_artists.html', results=response, search_term=search_term)
 
 
-@app.route('/artists/<int:artist_id>')
+@main.route('/artists/<int:artist_id>')
+@page_cache.cached('artist:{artist_id}')
 def show_artist(artist_id):
     # get by id
-    artist = Artist.query.get(artist_id)
+    artist = db.get_or_404(Artist, artist_id)
 
     # artist data
     data = artist.get_data()
@@ -271,128 +335,162 @@ def show_artist(artist_id):
             "venue_id": show.venue.id,
             "venue_name": show.venue.name,
             "venue_image_link": show.venue.image_link,
-            "start_time": show.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            "start_time": show.start_time
         }
 
+    # one "now" for both past and upcoming shows
+    now = datetime.now()
+
     # past_shows
-    past_shows = artist.get_past_shows()
+    past_shows = artist.get_past_shows(now)
     data['past_shows_count'] = len(past_shows)
     data['past_shows'] = []
     for show in past_shows:
         data['past_shows'].append(get_show_dict(show))
 
     # upcoming shows
-    upcoming_shows = artist.get_upcoming_shows()
+    upcoming_shows = artist.get_upcoming_shows(now)
     data['upcoming_shows_count'] = len(upcoming_shows)
     data['upcoming_shows'] = []
     for show in upcoming_shows:
         data['upcoming_shows'].append(get_show_dict(show))
 
+    # artists you may also like, from the neighbour table
+    data['similar_artists'] = [row._asdict() for row in artist.get_similar(
+        current_app.config['SIMILARITY_SHOWN'])]
+
     return render_template('pages/show_artist.html', artist=data)
 
 #  Update
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@main.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+    from forms import ArtistForm
     # get by id
-    artist = Artist.query.get(artist_id)
+    artist = db.get_or_404(Artist, artist_id)
 
     # form with setting default values
     data = artist.get_data(include_id=False)
+    data['version'] = artist.version
     form = ArtistForm(data=data)
 
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@main.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
+    from forms import ArtistForm
     # validate form
     form = ArtistForm(request.form)
     if not form.validate():
-        artist = Artist.query.get(artist_id)
+        # the page only needs the id & name, no need to load the artist
+        artist = {'id': artist_id, 'name': form.name.data}
         return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-    # edit artist
-    try:
-        artist = Artist.query.get(artist_id)
-        artist.set_data(form_data=request.form)
-        db.session.commit()
-    except:
-        db.session.rollback()
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-
-    return redirect(url_for('show_artist', artist_id=artist_id))
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+    # edit artist, the update only writes the changed columns and only
+    # succeeds if the artist is still at the version the form was loaded at
+    with Transaction(expected=StaleDataError) as transaction:
+        artist = db.get_or_404(Artist, artist_id)
+        if artist.version != form.version.data:
+            raise StaleDataError()
+        if artist.set_data(form_data=request.form):
+            transaction.on_commit(
+                lambda: autocomplete.artist_index.add(artist_id, artist.name))
+            # venue pages listing this artist's shows
+            transaction.on_commit(
+                lambda: page_cache.invalidate('artists', 'artist:' + str(artist_id),
+                                              *['venue:' + str(id) for id in artist.get_venue_ids()]))
+
+    if isinstance(transaction.error, StaleDataError):
+        # the form again with the current values
+        artist = db.get_or_404(Artist, artist_id)
+        data = artist.get_data(include_id=False)
+        data['version'] = artist.version
+        form = ArtistForm(formdata=None, data=data)
+        form.version.errors = ['Artist was changed by someone else, review the current values and save again.']
+        return render_template('forms/edit_artist.html', form=form, artist=artist), 409
+    return redirect(url_for('main.show_artist', artist_id=artist_id))
+
+
+@main.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+    from forms import VenueForm
     # get by id
-    venue = Venue.query.get(venue_id)
+    venue = db.get_or_404(Venue, venue_id)
 
     # form with setting default values
     data = venue.get_data(include_id=False)
+    data['version'] = venue.version
     form = VenueForm(data=data)
 
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@main.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
+    from forms import VenueForm
     # validate form
     form = VenueForm(request.form)
     if not form.validate():
-        venue = Venue.query.get(venue_id)
+        # the page only needs the id & name, no need to load the venue
+        venue = {'id': venue_id, 'name': form.name.data}
         return render_template('forms/edit_venue.html', form=form, venue=venue)
 
-    # edit venue
-    try:
-        venue = Venue.query.get(venue_id)
-        venue.set_data(form_data=request.form)
-        db.session.commit()
-    except:
-        db.session.rollback()
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-
-    return redirect(url_for('show_venue', venue_id=venue_id))
+    # edit venue, the update only writes the changed columns and only
+    # succeeds if the venue is still at the version the form was loaded at
+    with Transaction(expected=StaleDataError) as transaction:
+        venue = db.get_or_404(Venue, venue_id)
+        if venue.version != form.version.data:
+            raise StaleDataError()
+        if venue.set_data(form_data=request.form):
+            transaction.on_commit(
+                lambda: autocomplete.venue_index.add(venue_id, venue.name))
+            # artist pages listing this venue's shows
+            transaction.on_commit(
+                lambda: page_cache.invalidate('venues', 'venue:' + str(venue_id),
+                                              *['artist:' + str(id) for id in venue.get_artist_ids()]))
+
+    if isinstance(transaction.error, StaleDataError):
+        # the form again with the current values
+        venue = db.get_or_404(Venue, venue_id)
+        data = venue.get_data(include_id=False)
+        data['version'] = venue.version
+        form = VenueForm(formdata=None, data=data)
+        form.version.errors = ['Venue was changed by someone else, review the current values and save again.']
+        return render_template('forms/edit_venue.html', form=form, venue=venue), 409
+    return redirect(url_for('main.show_venue', venue_id=venue_id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists/create', methods=['GET'])
+@main.route('/artists/create', methods=['GET'])
 def create_artist_form():
+    from forms import ArtistForm
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
 
-@app.route('/artists/create', methods=['POST'])
+@main.route('/artists/create', methods=['POST'])
 def create_artist_submission():
+    from forms import ArtistForm
     # validate form
     form = ArtistForm(request.form)
     if not form.validate():
         return render_template('forms/new_artist.html', form=form)
 
     # create artist
-    error = False
-    try:
+    with Transaction() as transaction:
         artist = Artist()
         artist.set_data(form_data=request.form)
         db.session.add(artist)
-        db.session.commit()
-    except:
-        error = True
-        db.session.rollback()
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-
-    if error:
+        transaction.on_commit(
+            lambda: autocomplete.artist_index.add(artist.id, artist.name))
+        transaction.on_commit(page_cache.invalidate, 'artists')
+
+    if transaction.failed:
         flash('An error occurred. Artist ' +
               request.form.get('name', '') + ' could not be listed.')
     else:
@@ -402,30 +500,97 @@ def create_artist_submission():
     return render_template('pages/home.html')
 
 
+@main.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    with Transaction() as transaction:
+        # artists listing this one as similar, their rows go with it
+        similar_ids = Artist.get_similar_to_ids(artist_id)
+        venue_ids = Artist.delete_by_id(artist_id)
+        if venue_ids is None:
+            abort(404)
+        # shows deleted by the database skip the counter hooks
+        counters.rebuild_all(db.session.connection(),
+                             venue_ids=venue_ids, artist_ids=[])
+        transaction.on_commit(autocomplete.artist_index.remove, artist_id)
+        # venue pages listing this artist's shows & their upcoming shows
+        # counts in the venues listing, artist pages listing it as similar
+        transaction.on_commit(page_cache.invalidate, 'artists', 'venues',
+                              'artist:' + str(artist_id),
+                              *['venue:' + str(id) for id in venue_ids],
+                              *['artist:' + str(id) for id in similar_ids])
+
+    if transaction.failed:
+        abort(500)
+    return ''
+
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@main.route('/shows')
 def shows():
-    shows = Show.query.all()
+    # page size, capped by config
+    per_page = request.args.get(
+        'per_page', current_app.config['SHOWS_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['SHOWS_MAX_PER_PAGE']))
+
+    # page cursors & optional time range
+    try:
+        after = request.args.get('after')
+        before = request.args.get('before')
+        start, end = get_time_range()
+        page = Show.get_page(
+            after=Show.decode_cursor(after) if after else None,
+            before=Show.decode_cursor(before) if before else None,
+            per_page=per_page,
+            start=start,
+            end=end
+        )
+    except ValueError:
+        abort(400)
+
+    # time range args kept by the pager links
+    time_range = {key: request.args[key]
+                  for key in ('from', 'to') if request.args.get(key)}
 
     # final data for the template
     data = []
-    for show in shows:
+    for show in page['shows']:
         data.append({
             "venue_id": show.venue.id,
             "venue_name": show.venue.name,
             "artist_id": show.artist.id,
             "artist_name": show.artist.name,
             "artist_image_link": show.artist.image_link,
-            "start_time": show.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            "start_time": show.start_time
         })
 
-    return render_template('pages/shows.html', shows=data)
+    return render_template('pages/shows.html', shows=data, per_page=per_page, time_range=time_range,
+                           prev_cursor=page['prev_cursor'], next_cursor=page['next_cursor'])
+
+
+@main.route('/export/shows.<format>')
+def export_shows(format):
+    if format not in exporter.FORMATS:
+        abort(404)
+
+    # optional date range & venue filters
+    try:
+        start, end, venue_id = exporter.parse_filters(
+            request.args.get('from'), request.args.get('to'), request.args.get('venue_id'))
+    except ValueError:
+        abort(400)
+
+    # streamed from a server side cursor, memory stays flat
+    iter_format, mimetype = exporter.FORMATS[format]
+    rows = exporter.iter_shows(start, end, venue_id)
+    return Response(stream_with_context(iter_format(rows)), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=shows.{format}'
+    })
 
 
-@app.route('/shows/create')
+@main.route('/shows/create')
 def create_shows():
+    from forms import ShowForm
     data = {
         'venue_id': request.args.get('venue_id', ''),
         'artist_id': request.args.get('artist_id', '')
@@ -434,30 +599,53 @@ def create_shows():
     return render_template('forms/new_show.html', form=form)
 
 
-@app.route('/shows/create', methods=['POST'])
+@main.route('/shows/create', methods=['POST'])
 def create_show_submission():
+    from forms import ShowForm
     # validate form
     form = ShowForm(request.form)
     if not form.validate():
         return render_template('forms/new_show.html', form=form)
 
+    # ids must be numbers
+    ids = {}
+    for field in (form.venue_id, form.artist_id):
+        try:
+            ids[field.name] = int(field.data)
+        except ValueError:
+            field.errors.append('Must be a number.')
+    if len(ids) < 2:
+        return render_template('forms/new_show.html', form=form)
+
     # create show
-    error = False
-    try:
-        show = Show()
-        show.venue_id = request.form.get('venue_id', '')
-        show.artist_id = request.form.get('artist_id', '')
-        show.start_time = request.form.get('start_time', '')
-        db.session.add(show)
-        db.session.commit()
-    except:
-        error = True
-        db.session.rollback()
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-
-    if error:
+    with Transaction() as transaction:
+        # venue & artist must exist and be free for the show's slot
+        Show.lock_booking(ids['venue_id'], ids['artist_id'])
+        check = Show.get_booking_check(
+            ids['venue_id'], ids['artist_id'], form.start_time.data)
+        if not check['venue_exists']:
+            form.venue_id.errors.append('Venue does not exist.')
+        elif check['venue_booked']:
+            form.venue_id.errors.append(
+                'Venue is already booked at this time.')
+        if not check['artist_exists']:
+            form.artist_id.errors.append('Artist does not exist.')
+        elif check['artist_booked']:
+            form.artist_id.errors.append(
+                'Artist is already booked at this time.')
+        if not (form.venue_id.errors or form.artist_id.errors):
+            show = Show()
+            show.venue_id = ids['venue_id']
+            show.artist_id = ids['artist_id']
+            show.start_time = form.start_time.data
+            db.session.add(show)
+            transaction.on_commit(page_cache.invalidate, 'venues',
+                                  'venue:' + str(ids['venue_id']),
+                                  'artist:' + str(ids['artist_id']))
+
+    if form.venue_id.errors or form.artist_id.errors:
+        return render_template('forms/new_show.html', form=form)
+    if transaction.failed:
         flash('Show could not be listed.')
     else:
         flash('Show was successfully listed!')
@@ -465,26 +653,64 @@ def create_show_submission():
     return render_template('pages/home.html')
 
 
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
+#----------------------------------------------------------------------------#
+# App Factory.
+#----------------------------------------------------------------------------#
+
+# flask db, flask_migrate & alembic are only imported when it runs
+@click.command('db', add_help_option=False, context_settings={
+    'ignore_unknown_options': True, 'allow_extra_args': True})
+@click.pass_context
+def migrate_command(ctx):
+    """Perform database migrations."""
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as migrate_group
+    Migrate(current_app._get_current_object(), db)
+    migrate_group.main(ctx.args, prog_name=ctx.command_path)
+
+
+def create_app(config='config'):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    moment.init_app(app)
+    pool_monitor.init_app(app)
+    db.init_app(app)
+    replica_router.init_app(app)
+    app.cli.add_command(migrate_command)
+    page_cache.init_app(app)
+    metrics.init_app(app)
+    app.register_blueprint(main)
+    app.register_blueprint(api)
+    importer.init_app(app)
+    exporter.init_app(app)
+    counters.init_app(app)
+    partitions.init_app(app)
+    similarity.init_app(app)
+    assets.init_app(app)
+    templating.init_app(app)
+
+    if not app.debug:
+        file_handler = FileHandler('error.log')
+        file_handler.setFormatter(
+            Formatter(
+                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.info('errors')
+
+    return app
 
 #----------------------------------------------------------------------------#
 # Launch.
@@ -492,11 +718,11 @@ if not app.debug:
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+# bundles built into static/dist, sources relative to static in load order
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    'main.js': [
+        'js/script.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ],
+}
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+# hashed file names never change content, so they can be cached for good
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# precompressed variants by preference, with their file suffix
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+# minifiers are in requirements.txt, bundles are only concatenated without
+# them, with a warning once per process
+missing_minifiers = set()
+
+
+def minify(name, source):
+    module = 'rcssmin' if name.endswith('.css') else 'rjsmin'
+    try:
+        if name.endswith('.css'):
+            from rcssmin import cssmin
+            return cssmin(source)
+        from rjsmin import jsmin
+        return jsmin(source)
+    except ImportError:
+        if module not in missing_minifiers:
+            missing_minifiers.add(module)
+            current_app.logger.warning('%s is not installed, %s bundles are not minified',
+                                       module, name.rsplit('.', 1)[1])
+        return source
+
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, 9, mtime=0)
+    import brotli
+    return brotli.compress(data)
+
+
+class Assets:
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.dist = os.path.join(app.static_folder, DIST)
+        self.load()
+        app.add_url_rule(f'{app.static_url_path}/{DIST}/<path:filename>',
+                         'dist', self.send)
+        app.jinja_env.globals['asset_urls'] = self.get_urls
+        app.cli.add_command(build_assets_command)
+
+    # bundle name to hashed file name, empty until flask build-assets runs
+    def load(self):
+        try:
+            with open(os.path.join(self.dist, MANIFEST)) as file:
+                self.manifest = json.load(file)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    # urls of the bundle, the source files when it isn't built
+    def get_urls(self, name):
+        if name in self.manifest:
+            return [url_for('dist', filename=self.manifest[name])]
+        return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+    def build(self):
+        os.makedirs(self.dist, exist_ok=True)
+        manifest = {}
+        for name, sources in BUNDLES.items():
+            parts = []
+            for source in sources:
+                with open(os.path.join(current_app.static_folder, source), encoding='utf-8') as file:
+                    parts.append(minify(name, file.read()))
+            # ; guards against sources without a trailing semicolon
+            data = (';\n' if name.endswith('.js') else '\n').join(parts).encode()
+
+            stem, ext = os.path.splitext(name)
+            filename = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+            with open(os.path.join(self.dist, filename), 'wb') as file:
+                file.write(data)
+            for encoding, suffix in ENCODINGS:
+                try:
+                    compressed = compress(data, encoding)
+                except ImportError:
+                    continue
+                with open(os.path.join(self.dist, filename + suffix), 'wb') as file:
+                    file.write(compressed)
+            manifest[name] = filename
+
+        with open(os.path.join(self.dist, MANIFEST), 'w') as file:
+            json.dump(manifest, file, indent=2)
+        self.manifest = manifest
+        return manifest
+
+    # built files, precompressed when the client accepts it
+    def send(self, filename):
+        mimetype = mimetypes.guess_type(filename)[0]
+        for encoding, suffix in ENCODINGS:
+            if encoding in request.accept_encodings and \
+                    os.path.isfile(os.path.join(self.dist, filename + suffix)):
+                response = send_from_directory(
+                    self.dist, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.dist, filename, mimetype=mimetype)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = Assets()
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Bundle, fingerprint and precompress the static assets."""
+    for name, filename in assets.build().items():
+        click.echo(f'{name} -> {DIST}/{filename}')
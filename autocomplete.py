@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from models import db, Venue, Artist
+
+
+# casefold & collapse whitespace so lookups ignore case and spacing
+def normalize(name):
+    return ' '.join((name or '').casefold().split())
+
+
+# index keys of a name: the name from every word start,
+# so "blue" finds "The Blue Note"
+def get_keys(name):
+    words = normalize(name).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    def __init__(self, load):
+        # callable returning (id, name) rows, used to (re)build the index
+        self.load = load
+        self.lock = threading.Lock()
+        # sorted (key, id) pairs for bisect
+        self.keys = []
+        # id -> display name
+        self.names = {}
+        self.built_at = None
+        # changes made while builds load the rows, one list per build
+        self.build_logs = []
+
+    # (re)build the whole index from the database, adds & removes made while
+    # the rows are loaded are replayed on the new index so none are lost
+    def build(self):
+        log = []
+        with self.lock:
+            self.build_logs.append(log)
+        try:
+            rows = self.load()
+            names = {id: name for id, name in rows}
+            keys = sorted((key, id) for id, name in names.items()
+                          for key in get_keys(name))
+        finally:
+            with self.lock:
+                self.build_logs.remove(log)
+        with self.lock:
+            self.names = names
+            self.keys = keys
+            self.built_at = time.monotonic()
+            for id, name in log:
+                self._remove(id)
+                if name is not None:
+                    self._add(id, name)
+
+    # build on first use & rebuild when older than max_age seconds. Not built
+    # by create_app, which also runs for CLI commands & migrations where the
+    # tables may not exist yet, and every worker would scan both tables
+    # before serving, the first type-ahead request of a worker builds it
+    def ensure_built(self, max_age=None):
+        if self.built_at is None or (
+                max_age and time.monotonic() - self.built_at > max_age):
+            self.build()
+
+    def _remove(self, id):
+        name = self.names.pop(id, None)
+        if name is None:
+            return
+        for key in get_keys(name):
+            i = bisect_left(self.keys, (key, id))
+            if i < len(self.keys) and self.keys[i] == (key, id):
+                del self.keys[i]
+
+    def _add(self, id, name):
+        self.names[id] = name
+        for key in get_keys(name):
+            insort(self.keys, (key, id))
+
+    # log a change for the builds in progress
+    def _log(self, id, name):
+        for log in self.build_logs:
+            log.append((id, name))
+
+    # add or rename an entry, only logged until the index is built
+    def add(self, id, name):
+        with self.lock:
+            self._log(id, name)
+            if self.built_at is None:
+                return
+            self._remove(id)
+            self._add(id, name)
+
+    def remove(self, id):
+        with self.lock:
+            self._log(id, None)
+            self._remove(id)
+
+    # entries whose name (or a word of it) starts with prefix
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self.lock:
+            i = bisect_left(self.keys, (prefix,))
+            while i < len(self.keys) and len(results) < limit:
+                key, id = self.keys[i]
+                if not key.startswith(prefix):
+                    break
+                if id not in seen:
+                    seen.add(id)
+                    results.append({"id": id, "name": self.names[id]})
+                i += 1
+        return results
+
+
+venue_index = PrefixIndex(
+    lambda: db.session.query(Venue.id, Venue.name).all())
+artist_index = PrefixIndex(
+    lambda: db.session.query(Artist.id, Artist.name).all())
+
+indexes = {
+    'venue': venue_index,
+    'artist': artist_index
+}
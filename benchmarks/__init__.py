@@ -0,0 +1 @@
+# Load benchmarks, see benchmarks/README.md
@@ -0,0 +1,73 @@
+# Cold start benchmark: fresh processes import the app and render /venues
+# once, without a bytecode cache, with an empty one and with one warmed by
+# flask precompile-templates
+#
+#   python -m benchmarks.cold_start --runs 10
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = '''
+import time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+imported = time.perf_counter()
+response = app.test_client().get('/venues')
+assert response.status_code == 200, response.status_code
+print(imported - started, time.perf_counter() - imported)
+'''
+
+
+def run_child(env):
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return [float(value) for value in output.split()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the time to the first rendered /venues.')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--shows', type=int, default=1000,
+                        help='shows seeded into the temporary sqlite database')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    try:
+        env = dict(os.environ,
+                   DATABASE_URL='sqlite:///' + os.path.join(directory, 'bench.db'),
+                   JINJA_BYTECODE_CACHE_DIR=os.path.join(directory, 'jinja'),
+                   FLASK_APP='app')
+        subprocess.run([sys.executable, '-m', 'benchmarks.seed', '--shows', str(args.shows)],
+                       env=env, check=True, capture_output=True)
+
+        results = {}
+        for mode in ['null', 'cold', 'warm']:
+            mode_env = dict(env, JINJA_BYTECODE_CACHE='null' if mode == 'null' else 'filesystem')
+            renders = []
+            for _ in range(args.runs):
+                shutil.rmtree(mode_env['JINJA_BYTECODE_CACHE_DIR'], ignore_errors=True)
+                if mode == 'warm':
+                    subprocess.run([sys.executable, '-m', 'flask', 'precompile-templates'], env=mode_env,
+                                   check=True, capture_output=True)
+                renders.append(run_child(mode_env))
+            results[mode] = renders
+            print(f'{mode}: import {statistics.median(r[0] for r in renders) * 1000:.1f}ms, '
+                  f'first /venues {statistics.median(r[1] for r in renders) * 1000:.1f}ms '
+                  f'(median of {args.runs})')
+
+        null = statistics.median(r[1] for r in results['null'])
+        warm = statistics.median(r[1] for r in results['warm'])
+        print(f'warm bytecode cache: first /venues {null / warm:.1f}x faster')
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Compare two benchmark reports, exit 1 on regressions
+#
+#   python -m benchmarks.compare before.json after.json --threshold 0.2
+
+import argparse
+import json
+import sys
+
+
+def compare(before, after, threshold):
+    regressions = []
+    lines = [f"{'route':<28}{'p95 before':>12}{'p95 after':>12}{'change':>9}{'sql before':>12}{'sql after':>11}"]
+    for name, new in after['routes'].items():
+        old = before['routes'].get(name)
+        if old is None:
+            continue
+        old_p95 = old['latency_ms']['p95']
+        new_p95 = new['latency_ms']['p95']
+        change = (new_p95 - old_p95) / old_p95 if old_p95 else 0
+        old_sql = old['sql_statements']['mean']
+        new_sql = new['sql_statements']['mean']
+        lines.append(f'{name:<28}{old_p95:>12.2f}{new_p95:>12.2f}{change:>+9.0%}{old_sql:>12.1f}{new_sql:>11.1f}')
+
+        if change > threshold:
+            regressions.append(f'{name}: p95 {old_p95:.2f}ms -> {new_p95:.2f}ms')
+        if new_sql > old_sql:
+            regressions.append(f'{name}: sql statements {old_sql:.1f} -> {new_sql:.1f}')
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare two benchmark reports.')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed p95 latency increase, default 0.2 (20%%)')
+    args = parser.parse_args(argv)
+
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+
+    lines, regressions = compare(before, after, args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print('\nregressions:\n  ' + '\n  '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
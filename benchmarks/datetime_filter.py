@@ -0,0 +1,46 @@
+# Micro-benchmark of the datetime template filter against the previous
+# parse-the-string-then-format implementation
+#
+#   python -m benchmarks.datetime_filter
+
+import argparse
+import timeit
+from datetime import datetime
+
+
+def format_datetime_before(value, format='medium'):
+    import babel.dates
+    import dateutil.parser
+
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the datetime template filter.')
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    from app import format_datetime
+
+    value = datetime(2035, 4, 1, 20, 0)
+    string = value.strftime("%Y-%m-%d %H:%M:%S")
+    for format in ['full', 'medium']:
+        assert format_datetime(value, format) == format_datetime_before(string, format)
+
+        before = timeit.timeit(
+            lambda: format_datetime_before(string, format), number=args.number)
+        after = timeit.timeit(
+            lambda: format_datetime(value, format), number=args.number)
+        print(f'{format}: before {before / args.number * 1e6:.1f}us, '
+              f'after {after / args.number * 1e6:.1f}us per call, '
+              f'{before / after:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# Import time profile of create_app() from python -X importtime, summarized
+# per top-level package, optionally checked against a baseline report
+#
+#   python -m benchmarks.importtime --output importtime.json
+#   python -m benchmarks.importtime --baseline benchmarks/importtime.json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = 'from app import create_app; create_app()'
+
+
+# (module, self us, cumulative us) per line of -X importtime output
+def parse_importtime(output):
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile(runs):
+    env = dict(os.environ, DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite://'))
+    totals = []
+    packages = {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD],
+                                env=env, check=True, capture_output=True, text=True).stderr
+        modules = parse_importtime(output)
+        totals.append(sum(self_us for _, self_us, _ in modules))
+        # self time of every module, per top-level package
+        run_packages = {}
+        for name, self_us, _ in modules:
+            package = name.split('.')[0]
+            run_packages[package] = run_packages.get(package, 0) + self_us
+        for package, us in run_packages.items():
+            packages.setdefault(package, []).append(us)
+
+    # medians over the runs, packages sorted by time
+    def median(values):
+        return sorted(values)[len(values) // 2]
+    return {
+        "python": sys.version.split()[0],
+        "total_ms": median(totals) / 1000,
+        "packages": {package: median(us) / 1000 for package, us in sorted(
+            packages.items(), key=lambda item: -median(item[1]))},
+    }
+
+
+# new packages & a total over the threshold are regressions
+def compare(baseline, report, threshold):
+    regressions = []
+    for package in report['packages']:
+        if package not in baseline['packages']:
+            regressions.append(f'{package}: newly imported at startup')
+    change = (report['total_ms'] - baseline['total_ms']) / baseline['total_ms']
+    if change > threshold:
+        regressions.append(f"total: {baseline['total_ms']:.1f}ms -> {report['total_ms']:.1f}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Profile the import time of create_app().')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15,
+                        help='packages shown in the summary')
+    parser.add_argument('--output', help='report file')
+    parser.add_argument('--baseline', help='report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='allowed total import time increase, default 0.3 (30%%)')
+    args = parser.parse_args(argv)
+
+    report = profile(args.runs)
+    print(f"total {report['total_ms']:.1f}ms (median of {args.runs})")
+    for package, ms in list(report['packages'].items())[:args.top]:
+        print(f'{package:<28}{ms:>9.1f}ms')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file), report, args.threshold)
+        if regressions:
+            print('\nregressions:\n  ' + '\n  '.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
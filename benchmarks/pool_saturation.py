@@ -0,0 +1,162 @@
+# Connection pool load test: concurrent clients run a slow query through a
+# small pool while /healthz/db is polled, reports latency, pool waits &
+# timeouts per concurrency level
+#
+#   python -m benchmarks.pool_saturation --pool-size 4 --concurrency 2,4,8,32
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.run import percentile
+
+SLOW_PATH = '/_benchmark/slow'
+
+
+def run_level(app, db, concurrency, requests, hold_ms, poll_ms):
+    # fresh pool & checkout stats per level
+    with app.app_context():
+        db.engine.dispose()
+
+    latencies = []
+    statuses = {}
+    health = {'polls': 0, 'unhealthy': 0, 'max_checked_out': 0}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def client():
+        test_client = app.test_client()
+        for _ in range(requests):
+            started_at = time.perf_counter()
+            status = test_client.get(SLOW_PATH, query_string={'ms': hold_ms}).status_code
+            with lock:
+                latencies.append((time.perf_counter() - started_at) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    def poll():
+        test_client = app.test_client()
+        while not done.is_set():
+            response = test_client.get('/healthz/db')
+            health['polls'] += 1
+            health['unhealthy'] += response.status_code != 200
+            health['max_checked_out'] = max(
+                health['max_checked_out'], response.json['pool'].get('checked_out', 0))
+            done.wait(poll_ms / 1000)
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    started_at = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+    done.set()
+    poller.join()
+
+    pool = app.test_client().get('/healthz/db').json['pool']
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {p: round(percentile(latencies, int(p[1:])), 2) for p in ('p50', 'p95', 'p99')},
+        "pool": pool,
+        "healthz": health,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Load test the connection pool up to saturation.')
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--max-overflow', type=int, default=0)
+    parser.add_argument('--pool-timeout', type=float, default=1)
+    parser.add_argument('--concurrency', default='2,4,8,32',
+                        help='comma separated client thread counts')
+    parser.add_argument('--requests', type=int, default=20,
+                        help='requests per client thread')
+    parser.add_argument('--hold-ms', type=int, default=50,
+                        help='time each request holds its connection')
+    parser.add_argument('--poll-ms', type=int, default=100,
+                        help='/healthz/db polling interval')
+    parser.add_argument('--output', help='report file, default stdout')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    try:
+        # engine options are read from the environment by config
+        os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(directory, 'pool.db'))
+        os.environ['DATABASE_POOL_SIZE'] = str(args.pool_size)
+        os.environ['DATABASE_MAX_OVERFLOW'] = str(args.max_overflow)
+        os.environ['DATABASE_POOL_TIMEOUT'] = str(args.pool_timeout)
+
+        from flask import request
+        from sqlalchemy import event, text
+        from app import create_app
+        from cache import page_cache
+        from models import db
+
+        app = create_app()
+        app.config['PAGE_CACHE_BACKEND'] = 'null'
+        # pool timeouts are 500 responses, as in production
+        app.config['PROPAGATE_EXCEPTIONS'] = False
+        app.logger.disabled = True
+        page_cache.init_app(app)
+
+        # a query holding its connection for ?ms=, like a slow statement
+        def slow():
+            ms = request.args.get('ms', 0, type=int)
+            if db.engine.dialect.name == 'postgresql':
+                db.session.execute(text('SELECT pg_sleep(:s)'), {'s': ms / 1000})
+            else:
+                db.session.execute(text('SELECT benchmark_sleep(:ms)'), {'ms': ms})
+            db.session.close()
+            return ''
+        app.add_url_rule(SLOW_PATH, 'benchmark_slow', slow)
+
+        def add_sleep(dbapi_connection, connection_record):
+            if hasattr(dbapi_connection, 'create_function'):
+                dbapi_connection.create_function(
+                    'benchmark_sleep', 1, lambda ms: time.sleep(ms / 1000) or 0)
+        with app.app_context():
+            event.listen(db.engine, 'connect', add_sleep)
+
+        levels = []
+        for concurrency in [int(value) for value in args.concurrency.split(',')]:
+            level = run_level(app, db, concurrency, args.requests, args.hold_ms, args.poll_ms)
+            levels.append(level)
+            print(f"concurrency {concurrency}: {level['throughput_rps']} rps, "
+                  f"p95 {level['latency_ms']['p95']}ms, statuses {level['statuses']}, "
+                  f"pool wait mean {level['pool'].get('wait_ms_mean')}ms "
+                  f"max {level['pool'].get('wait_ms_max')}ms, "
+                  f"timeouts {level['pool'].get('timeouts')}, "
+                  f"healthz unhealthy {level['healthz']['unhealthy']}/{level['healthz']['polls']}",
+                  file=sys.stderr)
+
+        report = {
+            "pool_size": args.pool_size,
+            "max_overflow": args.max_overflow,
+            "pool_timeout": args.pool_timeout,
+            "hold_ms": args.hold_ms,
+            "levels": levels,
+        }
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as file:
+                file.write(output)
+        else:
+            print(output)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
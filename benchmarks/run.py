@@ -0,0 +1,314 @@
+# Drive every route and report throughput, latency percentiles & SQL
+# statements per route as JSON
+#
+#   DATABASE_URL=sqlite:///bench.db python -m benchmarks.run --output before.json
+
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        event.listen(Engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def after_cursor_execute(self, *args):
+        with self.lock:
+            self.count += 1
+
+
+# nearest rank percentile of sorted values
+def percentile(values, p):
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+# (name, method, path, form data), path & form data may be callables run
+# before each request (not timed) for routes that need fresh rows
+def get_routes(db, include_writes=False):
+    from models import Venue, Artist, Show
+
+    venue_id = db.session.query(db.func.min(Venue.id)).scalar()
+    artist_id = db.session.query(db.func.min(Artist.id)).scalar()
+    if venue_id is None or artist_id is None:
+        sys.exit('no data, seed the database first: python -m benchmarks.seed')
+    show_id = db.session.query(db.func.min(Show.id)).scalar()
+    cursor = Show.get_page(per_page=1)['next_cursor'] or ''
+    # a month of shows at one venue, so exports stay small
+    export_args = urlencode({
+        'venue_id': venue_id, 'from': datetime.now().date().isoformat(),
+        'to': (datetime.now() + timedelta(days=30)).date().isoformat()})
+
+    routes = [
+        ('index', 'GET', '/', None),
+        ('venues', 'GET', '/venues', None),
+        ('venues_by_genre', 'GET', '/venues?genre=Jazz', None),
+        ('search_venues', 'POST', '/venues/search', {'search_term': 'blue'}),
+        ('show_venue', 'GET', f'/venues/{venue_id}', None),
+        ('create_venue_form', 'GET', '/venues/create', None),
+        ('edit_venue', 'GET', f'/venues/{venue_id}/edit', None),
+        ('artists', 'GET', '/artists', None),
+        ('artists_by_genre', 'GET', '/artists?genre=Jazz', None),
+        ('search_artists', 'POST', '/artists/search', {'search_term': 'blue'}),
+        ('search_artists_json', 'POST', '/artists/search',
+         {'search_term': 'blue', 'result_format': 'json'}),
+        ('show_artist', 'GET', f'/artists/{artist_id}', None),
+        ('create_artist_form', 'GET', '/artists/create', None),
+        ('edit_artist', 'GET', f'/artists/{artist_id}/edit', None),
+        ('shows', 'GET', '/shows', None),
+        ('shows_next_page', 'GET', '/shows?' + urlencode({'after': cursor}), None),
+        ('create_shows', 'GET', '/shows/create', None),
+        ('autocomplete_venue', 'GET', '/api/autocomplete?type=venue&q=blue', None),
+        ('autocomplete_artist', 'GET', '/api/autocomplete?type=artist&q=blue', None),
+        ('export_shows_csv', 'GET', '/export/shows.csv?' + export_args, None),
+        ('export_shows_ndjson', 'GET', '/export/shows.ndjson?' + export_args, None),
+        ('api_venues', 'GET', '/api/v1/venues', None),
+        ('api_venue', 'GET', f'/api/v1/venues/{venue_id}', None),
+        ('api_artists', 'GET', '/api/v1/artists', None),
+        ('api_artist', 'GET', f'/api/v1/artists/{artist_id}', None),
+        ('api_shows', 'GET', '/api/v1/shows', None),
+        ('api_show', 'GET', f'/api/v1/shows/{show_id}', None),
+        ('healthz_db', 'GET', '/healthz/db', None),
+        ('metrics', 'GET', '/metrics', None),
+    ]
+
+    if include_writes:
+        venue_form = {
+            'name': 'Benchmark Venue', 'city': 'Austin', 'state': 'TX',
+            'image_link': 'https://example.com/venue.jpg', 'genres': ['Jazz', 'Blues'],
+        }
+        artist_form = {
+            'name': 'Benchmark Artist', 'city': 'Austin', 'state': 'TX',
+            'image_link': 'https://example.com/artist.jpg', 'genres': ['Jazz'],
+        }
+        show_form = {
+            'venue_id': venue_id, 'artist_id': artist_id,
+            'start_time': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d %H:%M'),
+        }
+
+        # the row's current version & a new phone, so every edit is a partial
+        # update of one column instead of a stale save conflict
+        def get_edit_form(model, id, form):
+            def edit_form():
+                version = db.session.query(model.version).filter(model.id == id).scalar()
+                db.session.close()
+                return dict(form, version=version, phone=f'512-555-{version % 10000:04d}')
+            return edit_form
+
+        # a fresh venue for every delete
+        def create_venue():
+            venue = Venue(name='Benchmark Venue', city='Austin', state='TX',
+                          image_link='https://example.com/venue.jpg', _genres='Jazz')
+            db.session.add(venue)
+            db.session.commit()
+            path = f'/venues/{venue.id}'
+            db.session.close()
+            return path
+
+        # a fresh artist for every delete
+        def create_artist():
+            artist = Artist(name='Benchmark Artist', city='Austin', state='TX',
+                            image_link='https://example.com/artist.jpg', _genres='Jazz')
+            db.session.add(artist)
+            db.session.commit()
+            path = f'/artists/{artist.id}'
+            db.session.close()
+            return path
+
+        routes += [
+            ('create_venue_submission', 'POST', '/venues/create', venue_form),
+            ('edit_venue_submission', 'POST', f'/venues/{venue_id}/edit',
+             get_edit_form(Venue, venue_id, venue_form)),
+            ('create_artist_submission', 'POST', '/artists/create', artist_form),
+            ('edit_artist_submission', 'POST', f'/artists/{artist_id}/edit',
+             get_edit_form(Artist, artist_id, artist_form)),
+            ('create_show_submission', 'POST', '/shows/create', show_form),
+            ('delete_venue', 'DELETE', create_venue, None),
+            ('delete_artist', 'DELETE', create_artist, None),
+        ]
+
+    return routes
+
+
+class TestClientDriver:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code
+
+
+class HTTPDriver:
+    # real server on a local port, in a thread of this process
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def request(self, method, path, data):
+        body = urlencode(data, doseq=True).encode() if data else None
+        try:
+            with urlopen(Request(self.url + path, data=body, method=method)) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+
+
+def run_route(driver, counter, method, path, data, iterations, warmup):
+    latencies = []
+    statements = []
+    statuses = {}
+    for i in range(warmup + iterations):
+        request_path = path() if callable(path) else path
+        request_data = data() if callable(data) else data
+        count = counter.count
+        started_at = time.perf_counter()
+        status = driver.request(method, request_path, request_data)
+        elapsed = time.perf_counter() - started_at
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        statements.append(counter.count - count)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'method': method,
+        'requests': iterations,
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'throughput': iterations / total if total else None,
+        'latency_ms': {
+            'mean': total / iterations * 1000,
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+        },
+        'sql_statements': {
+            'mean': sum(statements) / iterations,
+            'max': max(statements),
+        },
+    }
+
+
+# static & built asset files, not app routes
+FILE_ENDPOINTS = {'static', 'dist'}
+
+
+# route callables query the database, so run them in an app context
+def in_app_context(app, value):
+    if not callable(value):
+        return value
+
+    def call():
+        with app.app_context():
+            return value()
+    return call
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark every route and report JSON.')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--http', action='store_true',
+                        help='drive a real HTTP server instead of the test client')
+    parser.add_argument('--writes', action='store_true',
+                        help='include create/edit/delete routes')
+    parser.add_argument('--page-cache', default='null',
+                        help="page cache backend during the run, default 'null' (off)")
+    parser.add_argument('--route', action='append',
+                        help='only run routes with this name, repeatable')
+    parser.add_argument('--output', help='report file, default stdout')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from cache import page_cache
+    from metrics import metrics
+    from models import db
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['PAGE_CACHE_BACKEND'] = args.page_cache
+    page_cache.init_app(app)
+    counter = StatementCounter()
+
+    with app.app_context():
+        routes = get_routes(db, args.writes)
+        dialect = db.engine.dialect.name
+        db.session.close()
+
+    driver = HTTPDriver(app) if args.http else TestClientDriver(app)
+    results = {}
+    for name, method, path, data in routes:
+        if args.route and name not in args.route:
+            continue
+        results[name] = run_route(
+            driver, counter, method, in_app_context(app, path),
+            in_app_context(app, data), args.iterations, args.warmup)
+        print(f"{name}: p50 {results[name]['latency_ms']['p50']:.2f}ms "
+              f"p95 {results[name]['latency_ms']['p95']:.2f}ms "
+              f"sql {results[name]['sql_statements']['mean']:.1f}", file=sys.stderr)
+
+    # app endpoints none of the routes requested, so new ones aren't left
+    # out silently, write only endpoints are expected without --writes
+    not_benchmarked = None
+    if not args.route:
+        not_benchmarked = sorted({
+            rule.endpoint for rule in app.url_map.iter_rules()
+            if rule.endpoint not in metrics.endpoints and rule.endpoint not in FILE_ENDPOINTS
+            and (args.writes or 'GET' in rule.methods)})
+        if not_benchmarked:
+            print('not benchmarked: ' + ', '.join(not_benchmarked), file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': get_commit(),
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'database': dialect,
+            'driver': 'http' if args.http else 'test_client',
+            'iterations': args.iterations,
+            'page_cache': args.page_cache,
+            'not_benchmarked': not_benchmarked,
+        },
+        'routes': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
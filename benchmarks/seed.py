@@ -0,0 +1,146 @@
+# Seed the database with synthetic venues, artists & shows
+#
+#   DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --scale small
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# number of shows, venues & artists are derived from it
+SCALES = {
+    'small': 1000,
+    'medium': 100000,
+    'large': 1000000,
+}
+
+BATCH_SIZE = 10000
+
+CITIES = [
+    ('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'),
+    ('Nashville', 'TN'), ('Chicago', 'IL'), ('Seattle', 'WA'),
+    ('New Orleans', 'LA'), ('Denver', 'CO'), ('Boston', 'MA'),
+    ('Atlanta', 'GA'),
+]
+
+WORDS = [
+    'Blue', 'Red', 'Golden', 'Electric', 'Velvet', 'Midnight', 'Silver',
+    'Wild', 'Crystal', 'Iron', 'Lucky', 'Neon', 'Hollow', 'Broken', 'Royal',
+]
+
+VENUE_NOUNS = ['Hall', 'Room', 'Lounge', 'Club', 'Tavern', 'Theatre', 'Bar']
+ARTIST_NOUNS = ['Band', 'Collective', 'Trio', 'Quartet', 'Orchestra', 'Project']
+
+
+def get_counts(shows):
+    return {
+        'shows': shows,
+        'venues': max(10, shows // 100),
+        'artists': max(10, shows // 50),
+    }
+
+
+# insert rows in batches with executemany
+def bulk_insert(db, table, rows):
+    for i in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[i:i + BATCH_SIZE])
+    db.session.commit()
+
+
+def get_name(rng, nouns, i):
+    return f'The {rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(nouns)} {i}'
+
+
+def seed(db, shows, random_seed=0, now=None):
+    from forms import GENRES
+    from models import (
+        Venue, Artist, Show, Genre, venue_genres, artist_genres)
+
+    if now is None:
+        now = datetime.now()
+    rng = random.Random(random_seed)
+    counts = get_counts(shows)
+
+    db.create_all()
+    genres = Genre.get_or_create_many([name for name, _ in GENRES])
+    db.session.commit()
+    genre_ids = {genre.name: genre.id for genre in genres}
+
+    # continue ids after existing rows
+    first_venue_id = (db.session.query(db.func.max(Venue.id)).scalar() or 0) + 1
+    first_artist_id = (db.session.query(db.func.max(Artist.id)).scalar() or 0) + 1
+
+    for model, association, fk, nouns, first_id, count in [
+        (Venue, venue_genres, 'venue_id', VENUE_NOUNS, first_venue_id, counts['venues']),
+        (Artist, artist_genres, 'artist_id', ARTIST_NOUNS, first_artist_id, counts['artists']),
+    ]:
+        rows = []
+        association_rows = []
+        for id in range(first_id, first_id + count):
+            city, state = rng.choice(CITIES)
+            names = rng.sample(list(genre_ids), rng.randint(1, 3))
+            row = {
+                'id': id,
+                'name': get_name(rng, nouns, id),
+                'city': city,
+                'state': state,
+                'phone': f'{rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}',
+                'image_link': f'https://example.com/images/{id}.jpg',
+                'genres': ','.join(names),
+                'seeking_description': 'Looking for new talent' if rng.random() < 0.3 else None,
+            }
+            if model is Venue:
+                row['address'] = f'{rng.randint(1, 999)} Main St'
+                row['seeking_talent'] = row['seeking_description'] is not None
+            else:
+                row['seeking_venue'] = row['seeking_description'] is not None
+            rows.append(row)
+            association_rows.extend(
+                {fk: id, 'genre_id': genre_ids[name]} for name in names)
+        bulk_insert(db, model.__table__, rows)
+        bulk_insert(db, association, association_rows)
+
+    # shows spread over two years around now, a quarter upcoming
+    rows = []
+    for _ in range(counts['shows']):
+        rows.append({
+            'venue_id': rng.randrange(first_venue_id, first_venue_id + counts['venues']),
+            'artist_id': rng.randrange(first_artist_id, first_artist_id + counts['artists']),
+            'start_time': now + timedelta(
+                days=rng.uniform(-540, 180), hours=rng.randint(0, 23)),
+        })
+    bulk_insert(db, Show.__table__, rows)
+
+    # bulk inserts bypass the ORM counter hooks
+    import counters
+    counters.rebuild_all(db.session.connection(), now=now)
+    db.session.commit()
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Seed the database with synthetic venues, artists & shows.')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--shows', type=int,
+                        help='number of shows, overrides --scale')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        started_at = time.perf_counter()
+        counts = seed(db, args.shows or SCALES[args.scale], args.seed)
+        elapsed = time.perf_counter() - started_at
+
+    print(f"seeded {counts['venues']} venues, {counts['artists']} artists, "
+          f"{counts['shows']} shows in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session, make_response
+
+# stands in for the per session csrf token inside cached pages
+CSRF_PLACEHOLDER = '__page_cache_csrf_token__'
+
+
+class MemoryCache:
+    # in-process LRU cache with per entry TTL
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # key -> (expires_at, value), oldest first
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    # ttl: seconds, defaults to the cache ttl, None never expires
+    def set(self, key, value, ttl=0):
+        if ttl == 0:
+            ttl = self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisCache:
+    # cache on a redis compatible client, values stored as json
+    def __init__(self, client, ttl=300, prefix='fyyur:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def set(self, key, value, ttl=0):
+        if ttl == 0:
+            ttl = self.ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class FakeRedis:
+    # local stand-in for the redis client methods RedisCache uses
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        value = self.data.get(name)
+        if value is None:
+            return None
+        expires_at, item = value
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[name]
+            return None
+        return item
+
+    def set(self, name, value, ex=None):
+        expires_at = time.monotonic() + ex if ex else None
+        self.data[name] = (expires_at, value.encode())
+        return True
+
+    def delete(self, *names):
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match='*'):
+        prefix = match.rstrip('*')
+        return [name for name in list(self.data) if name.startswith(prefix)]
+
+
+class PageCache:
+    # rendered page cache, pages are stored under the current version of
+    # their namespaces ("venues", "venue:1", ...), so invalidating a
+    # namespace is setting a new version and old pages are never read again
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('PAGE_CACHE_BACKEND', 'memory')
+        ttl = app.config.get('PAGE_CACHE_TTL', 300)
+        if backend == 'memory':
+            self.backend = MemoryCache(
+                app.config.get('PAGE_CACHE_MAX_ENTRIES', 1024), ttl)
+        elif backend == 'redis':
+            # optional dependency, only needed for this backend
+            import redis
+            self.backend = RedisCache(
+                redis.Redis.from_url(app.config['PAGE_CACHE_REDIS_URL']), ttl)
+        elif backend == 'fakeredis':
+            self.backend = RedisCache(FakeRedis(), ttl)
+        else:
+            self.backend = None
+
+    def get_version(self, namespace):
+        key = 'version:' + namespace
+        version = self.backend.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(key, version, ttl=None)
+        return version
+
+    def invalidate(self, *namespaces):
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            self.backend.set('version:' + namespace,
+                             uuid.uuid4().hex, ttl=None)
+
+    # cache a GET view, namespaces are formatted with the view args,
+    # e.g. @page_cache.cached('venue:{venue_id}')
+    def cached(self, *namespaces):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                # pending flash messages are rendered into the page
+                if self.backend is None or session.get('_flashes'):
+                    return view(**kwargs)
+
+                versions = [self.get_version(namespace.format(**kwargs))
+                            for namespace in namespaces]
+                key = 'page:' + request.endpoint + ':' + \
+                    request.full_path + ':' + ':'.join(versions)
+
+                # loaded on first use to keep flask_wtf out of startup
+                from flask_wtf.csrf import generate_csrf
+                page = self.backend.get(key)
+                if page is not None:
+                    body = page['body']
+                    if CSRF_PLACEHOLDER in body:
+                        body = body.replace(CSRF_PLACEHOLDER, generate_csrf())
+                    response = make_response(body, page['status'])
+                    response.mimetype = page['mimetype']
+                    return response
+
+                response = make_response(view(**kwargs))
+                if response.status_code == 200:
+                    body = response.get_data(as_text=True)
+                    if 'csrf_token' in body:
+                        body = body.replace(generate_csrf(), CSRF_PLACEHOLDER)
+                    self.backend.set(key, {
+                        "body": body,
+                        "status": response.status_code,
+                        "mimetype": response.mimetype
+                    })
+                return response
+            return wrapper
+        return decorator
+
+
+page_cache = PageCache()
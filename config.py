@@ -9,6 +9,72 @@ DEBUG = True
 # Connect to the database
 
 
-# DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/fyyur'
+# DATABASE URL, DATABASE_URL environment variable overrides the local database
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool of each engine (primary & replicas), per worker process
+SQLALCHEMY_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 5))
+SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW', 10))
+# seconds a request waits for a free connection before failing
+SQLALCHEMY_POOL_TIMEOUT = float(os.environ.get('DATABASE_POOL_TIMEOUT', 10))
+# connections are replaced after this many seconds, below server & proxy
+# idle timeouts, and tested before use so dropped ones are replaced too
+SQLALCHEMY_POOL_RECYCLE = 1800
+SQLALCHEMY_POOL_PRE_PING = True
+# per statement timeout in milliseconds on postgresql, 0 disables it
+SQLALCHEMY_STATEMENT_TIMEOUT_MS = int(
+    os.environ.get('DATABASE_STATEMENT_TIMEOUT_MS', 30000))
+# PgBouncer in transaction pooling mode: no connection startup options or
+# prepared statements, the statement timeout is set per transaction
+SQLALCHEMY_PGBOUNCER = os.environ.get('DATABASE_PGBOUNCER') == '1'
+
+# Read replicas for read-only requests, comma separated DATABASE_REPLICA_URLS,
+# a client reads from the primary for this many seconds after its writes
+SQLALCHEMY_REPLICA_URIS = [
+    uri for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri]
+SQLALCHEMY_REPLICA_STICKY_SECONDS = 5
+
+# Shows listing page size
+SHOWS_PER_PAGE = 30
+SHOWS_MAX_PER_PAGE = 100
+
+# Search results page size
+SEARCH_PER_PAGE = 20
+SEARCH_MAX_PER_PAGE = 50
+
+# Autocomplete, in-memory index is rebuilt from the database after this
+# many seconds to pick up writes from other workers
+AUTOCOMPLETE_REFRESH_SECONDS = 300
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+# Rendered page cache: 'memory', 'redis' (needs the redis package),
+# 'fakeredis' (local stand-in for tests) or 'null' to disable
+PAGE_CACHE_BACKEND = 'memory'
+PAGE_CACHE_TTL = 300
+PAGE_CACHE_MAX_ENTRIES = 1024
+PAGE_CACHE_REDIS_URL = 'redis://localhost:6379/0'
+
+# Per endpoint request & SQL metrics, Server-Timing header adds the
+# per request breakdown to responses for browser devtools
+METRICS_PATH = '/metrics'
+METRICS_SERVER_TIMING = DEBUG
+
+# Similar venues & artists, neighbours kept per row by flask build-similarity
+# (needs numpy & scipy), genre tags weighted against shared bookings, and
+# the number shown on the detail pages
+SIMILARITY_NEIGHBORS = 20
+SIMILARITY_GENRE_WEIGHT = 0.5
+SIMILARITY_SHOWN = 6
+
+# JSON API list page size
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+
+# Compiled template bytecode cache: 'filesystem' (shared by workers and
+# restarts, warmed by flask precompile-templates), 'memory' (per process)
+# or 'null' to compile every template on first use
+JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', 'filesystem')
+JINJA_BYTECODE_CACHE_DIR = os.environ.get(
+    'JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, '.jinja_cache'))
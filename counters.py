@@ -0,0 +1,159 @@
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from models import db, Venue, Artist, Show
+from cache import page_cache
+
+# counted tables & their show foreign key
+OWNERS = [
+    (Venue.__table__, Show.__table__.c.venue_id),
+    (Artist.__table__, Show.__table__.c.artist_id),
+]
+
+
+# counters recomputed from the shows, correlated to the owner row
+def get_rebuild_values(table, fk, now):
+    shows = Show.__table__
+    return {
+        'upcoming_shows_count': db.select(db.func.count()).where(
+            fk == table.c.id, shows.c.start_time > now).scalar_subquery(),
+        'past_shows_count': db.select(db.func.count()).where(
+            fk == table.c.id, shows.c.start_time <= now).scalar_subquery(),
+        'next_show_time': db.select(db.func.min(shows.c.start_time)).where(
+            fk == table.c.id, shows.c.start_time > now).scalar_subquery(),
+    }
+
+
+# rebuild counters of the given owner ids, all owners when None
+def rebuild(connection, table, fk, ids=None, now=None):
+    if now is None:
+        now = datetime.now()
+    statement = table.update().values(**get_rebuild_values(table, fk, now))
+    if ids is not None:
+        if not ids:
+            return 0
+        statement = statement.where(table.c.id.in_(ids))
+    return connection.execute(statement).rowcount
+
+
+def rebuild_all(connection, venue_ids=None, artist_ids=None, now=None):
+    rebuild(connection, Venue.__table__, Show.__table__.c.venue_id, venue_ids, now)
+    rebuild(connection, Artist.__table__, Show.__table__.c.artist_id, artist_ids, now)
+
+
+# move shows that started since the last roll-over from upcoming to past,
+# only owners whose next show has passed are recomputed, returns their ids
+# by table name
+def rollover(connection, now=None):
+    if now is None:
+        now = datetime.now()
+    ids = {}
+    for table, fk in OWNERS:
+        statement = table.update().values(
+            **get_rebuild_values(table, fk, now)
+        ).where(table.c.next_show_time <= now).returning(table.c.id)
+        ids[table.name] = connection.execute(statement).scalars().all()
+    return ids
+
+
+#  ORM hooks, counters change in the same transaction as the show
+#  ----------------------------------------------------------------
+
+# an owner whose next show passed is rolled over first, so its
+# counters are exact at now and the show is classified against now
+def rollover_owner(connection, table, fk, id, now):
+    connection.execute(table.update().values(
+        **get_rebuild_values(table, fk, now)
+    ).where(table.c.id == id, table.c.next_show_time <= now))
+
+
+@event.listens_for(Show, 'after_insert')
+def after_show_insert(mapper, connection, show):
+    now = datetime.now()
+    for table, fk in OWNERS:
+        id = getattr(show, fk.key)
+        rollover_owner(connection, table, fk, id, now)
+        if show.start_time > now:
+            connection.execute(table.update().values(
+                upcoming_shows_count=table.c.upcoming_shows_count + 1,
+                next_show_time=db.case(
+                    (db.or_(table.c.next_show_time.is_(None),
+                            table.c.next_show_time > show.start_time), show.start_time),
+                    else_=table.c.next_show_time)
+            ).where(table.c.id == id))
+        else:
+            connection.execute(table.update().values(
+                past_shows_count=table.c.past_shows_count + 1
+            ).where(table.c.id == id))
+
+
+@event.listens_for(Show, 'after_delete')
+def after_show_delete(mapper, connection, show):
+    now = datetime.now()
+    shows = Show.__table__
+    for table, fk in OWNERS:
+        id = getattr(show, fk.key)
+        rollover_owner(connection, table, fk, id, now)
+        if show.start_time > now:
+            # the show row is already gone from the next show subquery
+            connection.execute(table.update().values(
+                upcoming_shows_count=table.c.upcoming_shows_count - 1,
+                next_show_time=db.select(db.func.min(shows.c.start_time)).where(
+                    fk == table.c.id, shows.c.start_time > now).scalar_subquery()
+            ).where(table.c.id == id))
+        else:
+            connection.execute(table.update().values(
+                past_shows_count=table.c.past_shows_count - 1
+            ).where(table.c.id == id))
+
+
+#  Commands
+#  ----------------------------------------------------------------
+
+@click.command('rollover-shows')
+@with_appcontext
+def rollover_command():
+    """Move shows that have started from upcoming to past counters."""
+    ids = rollover(db.session.connection())
+    db.session.commit()
+    # listings & detail pages show the counters
+    page_cache.invalidate(
+        *(['venues'] if ids['Venue'] else []),
+        *(['artists'] if ids['Artist'] else []),
+        *['venue:' + str(id) for id in ids['Venue']],
+        *['artist:' + str(id) for id in ids['Artist']])
+    click.echo(f"rolled over {len(ids['Venue'])} venues & {len(ids['Artist'])} artists")
+
+
+@click.command('check-show-counters')
+@click.option('--fix', is_flag=True, help='rebuild all counters from the shows')
+@with_appcontext
+def check_command(fix):
+    """Compare show counters with the shows table."""
+    now = datetime.now()
+    connection = db.session.connection()
+    mismatches = 0
+    for table, fk in OWNERS:
+        values = get_rebuild_values(table, fk, now)
+        count = connection.execute(db.select(db.func.count()).select_from(table).where(db.or_(
+            table.c.upcoming_shows_count != values['upcoming_shows_count'],
+            table.c.past_shows_count != values['past_shows_count'],
+            # null safe next show comparison
+            db.func.coalesce(table.c.next_show_time, datetime.min) !=
+            db.func.coalesce(values['next_show_time'], datetime.min)
+        ))).scalar()
+        click.echo(f'{table.name}: {count} rows out of date')
+        mismatches += count
+
+    if fix:
+        rebuild_all(connection, now=now)
+        db.session.commit()
+        click.echo('rebuilt all counters')
+    elif mismatches:
+        raise SystemExit(1)
+
+
+def init_app(app):
+    app.cli.add_command(rollover_command)
+    app.cli.add_command(check_command)
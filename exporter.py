@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from models import db, Venue, Artist, Show
+
+COLUMNS = ['id', 'start_time', 'venue_id', 'venue_name',
+           'artist_id', 'artist_name']
+
+# rows fetched per round trip of the server side cursor
+BATCH_SIZE = 1000
+
+
+# show rows with venue & artist names, streamed with a server side cursor
+def iter_shows(start=None, end=None, venue_id=None):
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name')
+    ).join(Venue, Venue.id == Show.venue_id).join(
+        Artist, Artist.id == Show.artist_id)
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    if venue_id is not None:
+        query = query.filter(Show.venue_id == venue_id)
+
+    return query.order_by(Show.id).execution_options(
+        stream_results=True).yield_per(BATCH_SIZE)
+
+
+# csv lines, header first
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow([row.id, row.start_time.isoformat(), row.venue_id,
+                         row.venue_name, row.artist_id, row.artist_name])
+        # flush per batch, not per row
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# one json object per line
+def iter_ndjson(rows):
+    lines = []
+    for row in rows:
+        data = row._asdict()
+        data['start_time'] = data['start_time'].isoformat()
+        lines.append(json.dumps(data) + '\n')
+        if len(lines) >= BATCH_SIZE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+# export filters from strings, raises ValueError
+def parse_filters(start, end, venue_id):
+    return (
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None,
+        int(venue_id) if venue_id else None
+    )
+
+
+@click.command('export-shows')
+@click.option('--format', 'format', type=click.Choice(list(FORMATS)), default='csv', show_default=True)
+@click.option('--output', type=click.File('w'), default='-', help='defaults to stdout')
+@click.option('--from', 'start', help='shows starting at or after, ISO date/time')
+@click.option('--to', 'end', help='shows starting before, ISO date/time')
+@click.option('--venue', 'venue_id', type=int)
+@with_appcontext
+def export_shows_command(format, output, start, end, venue_id):
+    """Stream every show with its venue and artist names."""
+    try:
+        start, end, venue_id = parse_filters(start, end, venue_id)
+    except ValueError as error:
+        raise click.BadParameter(str(error))
+
+    iter_format = FORMATS[format][0]
+    for chunk in iter_format(iter_shows(start, end, venue_id)):
+        output.write(chunk)
+
+
+def init_app(app):
+    app.cli.add_command(export_shows_command)
@@ -13,6 +13,16 @@ def test():
         abort("Aborted at user request.")
 
 
+def benchmark(scale='small', output='bench.json'):
+    local("python -m benchmarks.seed --scale {}".format(scale))
+    local("python -m benchmarks.run --output {}".format(output))
+
+
+def build():
+    local("flask build-assets")
+    local("flask precompile-templates")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -6,8 +6,10 @@ from wtforms import (
     SelectMultipleField,
     DateTimeField,
     BooleanField,
-    TextAreaField
+    TextAreaField,
+    IntegerField
 )
+from wtforms.widgets import HiddenInput
 from wtforms.validators import DataRequired, URL, Regexp, Optional
 
 STATES = [
@@ -105,6 +107,8 @@ class ShowForm(FlaskForm):
 
 
 class VenueForm(FlaskForm):
+    # row version the edit form was loaded at
+    version = IntegerField(widget=HiddenInput(), validators=[Optional()])
     name = StringField(
         'Name', validators=[DataRequired()]
     )
@@ -143,6 +147,8 @@ class VenueForm(FlaskForm):
 
 
 class ArtistForm(FlaskForm):
+    # row version the edit form was loaded at
+    version = IntegerField(widget=HiddenInput(), validators=[Optional()])
     name = StringField(
         'Name', validators=[DataRequired()]
     )
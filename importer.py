@@ -0,0 +1,286 @@
+import csv
+import io
+import json
+import os
+import time
+import click
+from flask.cli import with_appcontext
+from werkzeug.datastructures import MultiDict
+from models import db, Venue, Artist, Show, Genre, venue_genres, artist_genres
+from cache import page_cache
+import counters
+
+# form class name, model, genres association & its key, per importable kind
+KINDS = {
+    'venues': ('VenueForm', Venue, venue_genres, 'venue_id'),
+    'artists': ('ArtistForm', Artist, artist_genres, 'artist_id'),
+    'shows': ('ShowForm', Show, None, None),
+}
+
+
+# stream rows of a csv or ndjson file as (line number, dict), ndjson lines
+# that aren't json objects are passed to rejected
+def read_rows(file, format, rejected):
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as error:
+                rejected(line_num, line.rstrip('\n'), {'json': [str(error)]})
+                continue
+            if not isinstance(row, dict):
+                rejected(line_num, row, {'json': ['Must be an object.']})
+                continue
+            yield line_num, row
+
+
+# row dict to form data, genres may be a list or a comma separated string
+def get_form_data(row):
+    data = MultiDict()
+    for key, value in row.items():
+        if value is None:
+            continue
+        if key == 'genres':
+            if isinstance(value, str):
+                value = [genre.strip() for genre in value.split(',') if genre.strip()]
+            data.setlist(key, value)
+        elif isinstance(value, bool):
+            if value:
+                data.add(key, 'y')
+        else:
+            data.add(key, str(value))
+    return data
+
+
+# validate with the form rules, no request context needed
+def validate_row(form_class, row):
+    form = form_class(formdata=get_form_data(row), meta={'csrf': False})
+    valid = form.validate()
+    # show ids must be numbers, as in create_show_submission
+    for name in ('venue_id', 'artist_id'):
+        field = form._fields.get(name)
+        if field is not None and field.data and not field.errors:
+            try:
+                int(field.data)
+            except ValueError:
+                field.errors.append('Must be a number.')
+                valid = False
+    if valid:
+        return form.data, None
+    return None, {name: field.errors for name, field in form._fields.items() if field.errors}
+
+
+# table row from validated form data, same fields set_data() writes
+def get_table_row(model, data):
+    row = {}
+    for column in model.__table__.columns:
+        if column.key in ('id', 'version'):
+            continue
+        if column.key == 'genres':
+            row['genres'] = ','.join(data['genres'])
+        elif column.key in ('venue_id', 'artist_id'):
+            row[column.key] = int(data[column.key])
+        elif column.key in data:
+            row[column.key] = data[column.key] if data[column.key] != '' else None
+    return row
+
+
+# reserve ids for a batch, so association rows can reference them. Only
+# postgres reserves them from the sequence, elsewhere they follow max(id),
+# so imports there must not run alongside other writers (e.g. the app)
+def reserve_ids(connection, table, count):
+    if connection.dialect.name == 'postgresql':
+        result = connection.execute(db.text(
+            "SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"
+        ), {'table': '"' + table.name + '"', 'count': count})
+        return [id for id, in result]
+    first_id = (connection.execute(
+        db.select(db.func.max(table.c.id))).scalar() or 0) + 1
+    return list(range(first_id, first_id + count))
+
+
+# COPY on postgres (psycopg2), executemany elsewhere
+def write_rows(connection, table, rows):
+    if not rows:
+        return
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert('COPY "{}" ({}) FROM STDIN WITH (FORMAT csv)'.format(
+                table.name, ', '.join('"' + column + '"' for column in columns)), buffer)
+        finally:
+            cursor.close()
+    else:
+        connection.execute(table.insert(), rows)
+
+
+# ids of rows referenced by shows that do not exist, one query per table
+def get_missing_ids(connection, table, ids):
+    found = {id for id, in connection.execute(
+        db.select(table.c.id).where(table.c.id.in_(ids)))}
+    return set(ids) - found
+
+
+# start times of the shows of the rows' venues & artists around the rows'
+# start times, by ('venue_id', id) & ('artist_id', id), one query per batch
+def get_bookings(connection, rows):
+    shows = Show.__table__
+    start_times = [row['start_time'] for _, row, _ in rows]
+    result = connection.execute(db.select(
+        shows.c.venue_id, shows.c.artist_id, shows.c.start_time
+    ).where(
+        db.or_(shows.c.venue_id.in_({row['venue_id'] for _, row, _ in rows}),
+               shows.c.artist_id.in_({row['artist_id'] for _, row, _ in rows})),
+        shows.c.start_time > min(start_times) - Show.DURATION,
+        shows.c.start_time < max(start_times) + Show.DURATION))
+    bookings = {}
+    for venue_id, artist_id, start_time in result:
+        bookings.setdefault(('venue_id', venue_id), []).append(start_time)
+        bookings.setdefault(('artist_id', artist_id), []).append(start_time)
+    return bookings
+
+
+# whether a booking overlaps the slot at start_time, as Show.get_booking_check
+def is_booked(bookings, key, start_time):
+    return any(abs(start_time - booked) < Show.DURATION
+               for booked in bookings.get(key, ()))
+
+
+BOOKED_ERRORS = {
+    'venue_id': 'Venue is already booked at this time.',
+    'artist_id': 'Artist is already booked at this time.',
+}
+
+
+def write_batch(kind, rows, rejected):
+    _, model, association, key = KINDS[kind]
+    connection = db.session.connection()
+
+    if kind == 'shows':
+        missing_venues = get_missing_ids(
+            connection, Venue.__table__, {row['venue_id'] for _, row, _ in rows})
+        missing_artists = get_missing_ids(
+            connection, Artist.__table__, {row['artist_id'] for _, row, _ in rows})
+        # double bookings, with existing shows & earlier rows of the batch
+        bookings = get_bookings(connection, rows)
+        valid = []
+        for line_num, row, source in rows:
+            errors = {}
+            if row['venue_id'] in missing_venues:
+                errors['venue_id'] = ['Venue does not exist.']
+            if row['artist_id'] in missing_artists:
+                errors['artist_id'] = ['Artist does not exist.']
+            for key, message in BOOKED_ERRORS.items():
+                if key not in errors and is_booked(bookings, (key, row[key]), row['start_time']):
+                    errors[key] = [message]
+            if errors:
+                rejected(line_num, source, errors)
+            else:
+                valid.append(row)
+                for key in BOOKED_ERRORS:
+                    bookings.setdefault((key, row[key]), []).append(row['start_time'])
+        write_rows(connection, model.__table__, valid)
+        # bulk writes bypass the ORM counter hooks
+        counters.rebuild_all(
+            connection,
+            {row['venue_id'] for row in valid},
+            {row['artist_id'] for row in valid})
+        db.session.commit()
+        page_cache.invalidate(
+            'venues',
+            *{'venue:' + str(row['venue_id']) for row in valid},
+            *{'artist:' + str(row['artist_id']) for row in valid})
+        return len(valid)
+
+    ids = reserve_ids(connection, model.__table__, len(rows))
+    table_rows = []
+    genre_rows = []
+    for id, (_, row, _) in zip(ids, rows):
+        row['id'] = id
+        table_rows.append(row)
+        genre_rows.extend({key: id, 'genre_id': genre_id}
+                          for genre_id in row.pop('genre_ids'))
+    write_rows(connection, model.__table__, table_rows)
+    write_rows(connection, association, genre_rows)
+    db.session.commit()
+    page_cache.invalidate(kind)
+    return len(rows)
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(list(KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format', type=click.Choice(['csv', 'ndjson']),
+              help='file format, defaults to the file extension')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('--errors', 'errors_path',
+              help='rejected rows file, defaults to PATH.errors.ndjson')
+@with_appcontext
+def import_command(kind, path, format, batch_size, errors_path):
+    """Bulk import venues, artists or shows from a CSV or NDJSON file."""
+    if format is None:
+        format = 'csv' if path.endswith('.csv') else 'ndjson'
+    if errors_path is None:
+        errors_path = path + '.errors.ndjson'
+
+    # forms are only loaded by the commands that validate with them
+    import forms
+    form_name, model, association, key = KINDS[kind]
+    form_class = getattr(forms, form_name)
+    genre_ids = {}
+    counts = {'imported': 0, 'rejected': 0}
+    started_at = time.perf_counter()
+
+    with open(path, newline='') as file, open(errors_path, 'w') as errors_file:
+        def rejected(line_num, source, errors):
+            counts['rejected'] += 1
+            errors_file.write(json.dumps(
+                {"line": line_num, "row": source, "errors": errors}) + '\n')
+
+        batch = []
+        for line_num, source in read_rows(file, format, rejected):
+            data, errors = validate_row(form_class, source)
+            if errors:
+                rejected(line_num, source, errors)
+                continue
+
+            row = get_table_row(model, data)
+            if association is not None:
+                missing = [name for name in data['genres'] if name not in genre_ids]
+                if missing:
+                    genres = Genre.get_or_create_many(missing)
+                    db.session.flush()
+                    genre_ids.update((genre.name, genre.id) for genre in genres)
+                row['genre_ids'] = {genre_ids[name] for name in data['genres']}
+            batch.append((line_num, row, source))
+
+            if len(batch) >= batch_size:
+                counts['imported'] += write_batch(kind, batch, rejected)
+                batch = []
+        if batch:
+            counts['imported'] += write_batch(kind, batch, rejected)
+
+    elapsed = time.perf_counter() - started_at
+    click.echo('imported {} {}, rejected {} in {:.1f}s ({:.0f} rows/s)'.format(
+        counts['imported'], kind, counts['rejected'], elapsed,
+        (counts['imported'] + counts['rejected']) / elapsed if elapsed else 0))
+    if counts['rejected']:
+        click.echo(f'rejected rows written to {errors_path}')
+    elif os.path.getsize(errors_path) == 0:
+        os.remove(errors_path)
+
+
+def init_app(app):
+    app.cli.add_command(import_command)
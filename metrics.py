@@ -0,0 +1,141 @@
+import threading
+import time
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# histogram buckets, request latency in seconds & sql statements per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointStats:
+    def __init__(self):
+        # (method, status) -> requests
+        self.requests = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.sql_time = 0
+
+
+# format prometheus labels
+def get_labels(**labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+class Metrics:
+    # per endpoint request count, latency, sql statements & sql time of
+    # this process, exposed in prometheus text format
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # all engines, the app engine may be created after this, listened
+        # to once however many apps the factory creates
+        if not event.contains(Engine, 'before_cursor_execute', self.before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute',
+                         self.before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute',
+                         self.after_cursor_execute)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', False)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'),
+                         'metrics', self.metrics_view)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'sql_count' in g:
+            g.sql_started_at = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'sql_count' in g:
+            g.sql_count += 1
+            g.sql_time += time.perf_counter() - g.sql_started_at
+
+    def before_request(self):
+        g.request_started_at = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0
+
+    def after_request(self, response):
+        if 'request_started_at' not in g:
+            return response
+        duration = time.perf_counter() - g.request_started_at
+        endpoint = request.endpoint or 'none'
+
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            key = (request.method, response.status_code)
+            stats.requests[key] = stats.requests.get(key, 0) + 1
+            stats.latency.observe(duration)
+            stats.statements.observe(g.sql_count)
+            stats.sql_time += g.sql_time
+
+        if self.server_timing:
+            response.headers.add('Server-Timing', 'db;dur={:.2f};desc="{} queries", app;dur={:.2f}'.format(
+                g.sql_time * 1000, g.sql_count, duration * 1000))
+        return response
+
+    # prometheus text exposition format
+    def render(self):
+        lines = []
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+
+            lines.append('# HELP fyyur_http_requests_total Requests by endpoint, method & status.')
+            lines.append('# TYPE fyyur_http_requests_total counter')
+            for endpoint, stats in endpoints:
+                for (method, status), count in sorted(stats.requests.items()):
+                    lines.append('fyyur_http_requests_total' + get_labels(
+                        endpoint=endpoint, method=method, status=status) + f' {count}')
+
+            for name, help, attr in [
+                ('fyyur_http_request_duration_seconds', 'Request latency by endpoint.', 'latency'),
+                ('fyyur_sql_statements_per_request', 'SQL statements per request by endpoint.', 'statements'),
+            ]:
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} histogram')
+                for endpoint, stats in endpoints:
+                    histogram = getattr(stats, attr)
+                    for bucket, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket' + get_labels(
+                            endpoint=endpoint, le=bucket) + f' {count}')
+                    lines.append(f'{name}_bucket' + get_labels(
+                        endpoint=endpoint, le='+Inf') + f' {histogram.count}')
+                    lines.append(f'{name}_sum' + get_labels(
+                        endpoint=endpoint) + f' {histogram.sum}')
+                    lines.append(f'{name}_count' + get_labels(
+                        endpoint=endpoint) + f' {histogram.count}')
+
+            lines.append('# HELP fyyur_sql_duration_seconds_total SQL time by endpoint.')
+            lines.append('# TYPE fyyur_sql_duration_seconds_total counter')
+            for endpoint, stats in endpoints:
+                lines.append('fyyur_sql_duration_seconds_total' + get_labels(
+                    endpoint=endpoint) + f' {stats.sql_time}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+metrics = Metrics()
@@ -0,0 +1,41 @@
+"""add pg_trgm GIN indexes for venue & artist search
+
+Revision ID: 5b8f3d6e2a91
+Revises: 9a2d5e7c1f04
+Create Date: 2026-10-18 12:26:09.551870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8f3d6e2a91'
+down_revision = '9a2d5e7c1f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # trigram indexes are postgres only, other databases search by scan
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # expressions must match search.get_search_document()
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(
+        'CREATE INDEX "ix_Venue_search_trgm" ON "Venue" USING gin '
+        "((name || ' ' || city || ' ' || state || ' ' || genres) gin_trgm_ops)"
+    )
+    op.execute(
+        'CREATE INDEX "ix_Artist_search_trgm" ON "Artist" USING gin '
+        "((name || ' ' || city || ' ' || state || ' ' || genres) gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS "ix_Artist_search_trgm"')
+    op.execute('DROP INDEX IF EXISTS "ix_Venue_search_trgm"')
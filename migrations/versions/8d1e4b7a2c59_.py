@@ -0,0 +1,86 @@
+"""partition Show by start_time month (PostgreSQL)
+
+Revision ID: 8d1e4b7a2c59
+Revises: 3f6a9c2e8d47
+Create Date: 2026-10-18 17:21:40.518307
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1e4b7a2c59'
+down_revision = '3f6a9c2e8d47'
+branch_labels = None
+depends_on = None
+
+# months ahead of the current one partitioned up front, later months are
+# added by flask create-show-partitions
+MONTHS_AHEAD = 24
+
+INDEXES = [
+    ('ix_Show_venue_id_start_time', 'venue_id, start_time'),
+    ('ix_Show_artist_id_start_time', 'artist_id, start_time'),
+    ('ix_Show_start_time_id', 'start_time, id'),
+]
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def move_show_table(create_table, primary_key):
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_old"')
+    op.execute('ALTER TABLE "Show_old" RENAME CONSTRAINT "Show_pkey" TO "Show_old_pkey"')
+    op.execute('ALTER TABLE "Show_old" DROP CONSTRAINT "Show_venue_id_fkey"')
+    op.execute('ALTER TABLE "Show_old" DROP CONSTRAINT "Show_artist_id_fkey"')
+    for name, _ in INDEXES:
+        op.execute(f'DROP INDEX "{name}"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+
+    op.execute(f'CREATE TABLE "Show" (LIKE "Show_old" INCLUDING DEFAULTS){create_table}')
+    op.execute(f'ALTER TABLE "Show" ADD CONSTRAINT "Show_pkey" PRIMARY KEY ({primary_key})')
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT "Show_venue_id_fkey" FOREIGN KEY (venue_id) REFERENCES "Venue" (id)')
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT "Show_artist_id_fkey" FOREIGN KEY (artist_id) REFERENCES "Artist" (id)')
+    for name, columns in INDEXES:
+        op.execute(f'CREATE INDEX "{name}" ON "Show" ({columns})')
+
+
+def copy_show_rows():
+    op.execute('INSERT INTO "Show" SELECT * FROM "Show_old"')
+    op.execute('DROP TABLE "Show_old"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # the partition key has to be part of the primary key
+    move_show_table(' PARTITION BY RANGE (start_time)', 'id, start_time')
+
+    # a partition per month from the first show, the rest in the default
+    this_month = date.today().replace(day=1)
+    first = op.get_bind().execute(sa.text(
+        'SELECT MIN(start_time) FROM "Show_old"')).scalar()
+    month = min(first.date().replace(day=1), this_month) if first else this_month
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        end = add_months(month, 1)
+        op.execute(
+            f'CREATE TABLE "Show_y{month.year}m{month.month:02d}" PARTITION OF "Show" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')")
+        month = end
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+
+    copy_show_rows()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    move_show_table('', 'id')
+    copy_show_rows()
@@ -1,7 +1,91 @@
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import groupby
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+# sqlite only enforces foreign keys, and so ON DELETE CASCADE, when asked to
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys = ON')
+
+
+# columns not set from forms
+COMPUTED_KEYS = ['version', 'upcoming_shows_count',
+                 'past_shows_count', 'next_show_time']
+
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+    # columns
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    # get genres by names, creating missing ones
+    @classmethod
+    def get_or_create_many(cls, names):
+        genres = cls.query.filter(cls.name.in_(names)).all()
+        found = {genre.name for genre in genres}
+        for name in names:
+            if name not in found:
+                genre = cls(name=name)
+                db.session.add(genre)
+                genres.append(genre)
+                found.add(name)
+        return genres
+
+    def __repr__(self):
+        return f'<Genre id: {self.id}, name: {self.name}>'
+
+
+# venue <-> genre association, (genre_id, venue_id) index serves genre filters
+venue_genres = db.Table(
+    'VenueGenre',
+    db.Column('venue_id', db.Integer, db.ForeignKey(
+        'Venue.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey(
+        'Genre.id'), primary_key=True),
+    db.Index('ix_VenueGenre_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+# artist <-> genre association, (genre_id, artist_id) index serves genre filters
+artist_genres = db.Table(
+    'ArtistGenre',
+    db.Column('artist_id', db.Integer, db.ForeignKey(
+        'Artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey(
+        'Genre.id'), primary_key=True),
+    db.Index('ix_ArtistGenre_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+# top similar venues of each venue by rank, built by similarity.py, a
+# venue's neighbours are a range scan of the primary key
+venue_neighbors = db.Table(
+    'VenueNeighbor',
+    db.Column('venue_id', db.Integer, db.ForeignKey(
+        'Venue.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('rank', db.SmallInteger, primary_key=True),
+    db.Column('neighbor_id', db.Integer, db.ForeignKey(
+        'Venue.id', ondelete='CASCADE'), nullable=False, index=True),
+    db.Column('score', db.Float, nullable=False)
+)
+
+# top similar artists of each artist by rank, built by similarity.py
+artist_neighbors = db.Table(
+    'ArtistNeighbor',
+    db.Column('artist_id', db.Integer, db.ForeignKey(
+        'Artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('rank', db.SmallInteger, primary_key=True),
+    db.Column('neighbor_id', db.Integer, db.ForeignKey(
+        'Artist.id', ondelete='CASCADE'), nullable=False, index=True),
+    db.Column('score', db.Float, nullable=False)
+)
 
 
 class Venue(db.Model):
@@ -19,25 +103,43 @@ class Venue(db.Model):
     _genres = db.Column(db.String, name="genres", nullable=False)
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String)
+    # show counters, maintained by counters.py
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime())
+    # row version, incremented by every update
+    version = db.Column(db.Integer, nullable=False,
+                        default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
     # relationships
-    shows = db.relationship('Show', backref="venue",
-                            cascade="all, delete-orphan", lazy=True)
+    # shows are deleted by the database, ON DELETE CASCADE
+    shows = db.relationship('Show', backref="venue", cascade="all, delete-orphan",
+                            passive_deletes=True, lazy=True)
+    genre_tags = db.relationship('Genre', secondary=venue_genres, lazy=True)
 
     # genres property
     @property
     def genres(self):
         return self._genres.split(',')
 
-    # genres property setter
+    # genres property setter, keeps the genre tags in sync, without flushing
+    # pending changes so an edit stays a single UPDATE
     @genres.setter
     def genres(self, value):
         self._genres = ','.join(value)
+        with db.session.no_autoflush:
+            self.genre_tags = Genre.get_or_create_many(value)
 
     # get columns names in list
     def get_data_keys(self, include_id=True):
         keys = self.__table__.columns.keys()
         if not include_id:
             keys.remove('id')
+            # maintained by the mapper & counters, not editable
+            for key in COMPUTED_KEYS:
+                keys.remove(key)
         return keys
 
     # get get data dict with columns names and values
@@ -48,23 +150,112 @@ class Venue(db.Model):
             data[key] = getattr(self, key)
         return data
 
-    # set data from form data
+    # set data from form data, only the changed columns so updates only
+    # write those, returns the changed keys
     def set_data(self, form_data):
+        changed = []
         keys = self.get_data_keys(False)
         for key in keys:
             if key == 'genres':
-                setattr(self, key, form_data.getlist('genres'))
+                value = form_data.getlist('genres')
+                if ','.join(value) != self._genres:
+                    self.genres = value
+                    changed.append(key)
+                continue
             elif key == 'seeking_talent':
-                setattr(self, key, form_data.get(
-                    'seeking_talent', '') == 'y')
+                value = form_data.get('seeking_talent', '') == 'y'
             else:
-                setattr(self, key, form_data.get(key))
+                value = form_data.get(key)
+            if value != getattr(self, key):
+                setattr(self, key, value)
+                changed.append(key)
+        return changed
+
+    # past shows query with the artist eager loaded, optionally in [start, end)
+    def get_past_shows(self, now=None, start=None, end=None):
+        if now is None:
+            now = datetime.now()
+        return Show.query.options(db.joinedload(Show.artist)).filter(
+            Show.venue_id == self.id, Show.start_time <= now,
+            *Show.get_range_filters(start, end)
+        ).order_by(Show.start_time.desc()).all()
+
+    # upcoming shows query with the artist eager loaded, optionally in [start, end)
+    def get_upcoming_shows(self, now=None, start=None, end=None):
+        if now is None:
+            now = datetime.now()
+        return Show.query.options(db.joinedload(Show.artist)).filter(
+            Show.venue_id == self.id, Show.start_time > now,
+            *Show.get_range_filters(start, end)
+        ).order_by(Show.start_time).all()
+
+    # ids of artists with shows at this venue
+    def get_artist_ids(self):
+        return [id for id, in db.session.query(Show.artist_id).filter(
+            Show.venue_id == self.id).distinct()]
+
+    # most similar venues, nearest first, in one query on the neighbour table
+    def get_similar(self, limit=None):
+        query = db.session.query(
+            Venue.id, Venue.name, Venue.image_link, venue_neighbors.c.score
+        ).join(venue_neighbors, venue_neighbors.c.neighbor_id == Venue.id).filter(
+            venue_neighbors.c.venue_id == self.id
+        ).order_by(venue_neighbors.c.rank)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
 
-    def get_past_shows(self):
-        return list(filter(lambda show: show.start_time <= datetime.now(), self.shows))
+    # ids of venues listing the venue as similar, from the neighbour index
+    @staticmethod
+    def get_similar_to_ids(venue_id):
+        return [id for id, in db.session.query(venue_neighbors.c.venue_id).filter(
+            venue_neighbors.c.neighbor_id == venue_id)]
 
-    def get_upcoming_shows(self):
-        return list(filter(lambda show: show.start_time > datetime.now(), self.shows))
+    # deletes the venue in a single statement, its shows & genre tags go with
+    # it through ON DELETE CASCADE, returns the ids of the artists it had
+    # shows with or None when it doesn't exist
+    @classmethod
+    def delete_by_id(cls, venue_id):
+        artist_ids = [id for id, in db.session.query(Show.artist_id).filter(
+            Show.venue_id == venue_id).distinct()]
+        if not db.session.execute(db.delete(cls).where(cls.id == venue_id)).rowcount:
+            return None
+        return artist_ids
+
+    # ids of venues with the genre, resolved through the genre index
+    @staticmethod
+    def get_genre_ids_query(genre):
+        return db.session.query(venue_genres.c.venue_id).join(
+            Genre, Genre.id == venue_genres.c.genre_id
+        ).filter(Genre.name == genre)
+
+    # get venues grouped by area with upcoming shows count in one query
+    @classmethod
+    def get_areas(cls, genre=None):
+        rows = db.session.query(
+            cls.city,
+            cls.state,
+            cls.id,
+            cls.name,
+            cls.upcoming_shows_count.label('num_upcoming_shows')
+        )
+        if genre:
+            rows = rows.filter(cls.id.in_(cls.get_genre_ids_query(genre)))
+        rows = rows.order_by(cls.city, cls.state, cls.id).all()
+
+        # rows are ordered by area, so consecutive rows share an area
+        areas = []
+        for (city, state), area_rows in groupby(rows, key=lambda row: (row.city, row.state)):
+            areas.append({
+                "city": city,
+                "state": state,
+                "venues": [{
+                    "id": row.id,
+                    "name": row.name,
+                    "num_upcoming_shows": row.num_upcoming_shows
+                } for row in area_rows]
+            })
+        return areas
 
     def __repr__(self):
         return f'<Venue id: {self.id}, name: {self.name}, city: {self.city}, state: {self.state}>'
@@ -84,25 +275,43 @@ class Artist(db.Model):
     _genres = db.Column(db.String, name="genres", nullable=False)
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String)
+    # show counters, maintained by counters.py
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime())
+    # row version, incremented by every update
+    version = db.Column(db.Integer, nullable=False,
+                        default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
     # relationships
-    shows = db.relationship('Show', backref="artist",
-                            cascade="all, delete-orphan", lazy=True)
+    # shows are deleted by the database, ON DELETE CASCADE
+    shows = db.relationship('Show', backref="artist", cascade="all, delete-orphan",
+                            passive_deletes=True, lazy=True)
+    genre_tags = db.relationship('Genre', secondary=artist_genres, lazy=True)
 
     # genres property
     @property
     def genres(self):
         return self._genres.split(',')
 
-    # genres property setter
+    # genres property setter, keeps the genre tags in sync, without flushing
+    # pending changes so an edit stays a single UPDATE
     @genres.setter
     def genres(self, value):
         self._genres = ','.join(value)
+        with db.session.no_autoflush:
+            self.genre_tags = Genre.get_or_create_many(value)
 
     # get columns names in list
     def get_data_keys(self, include_id=True):
         keys = self.__table__.columns.keys()
         if not include_id:
             keys.remove('id')
+            # maintained by the mapper & counters, not editable
+            for key in COMPUTED_KEYS:
+                keys.remove(key)
         return keys
 
     # get get data dict with columns names and values
@@ -113,36 +322,209 @@ class Artist(db.Model):
             data[key] = getattr(self, key)
         return data
 
-    # set data from form data
+    # set data from form data, only the changed columns so updates only
+    # write those, returns the changed keys
     def set_data(self, form_data):
+        changed = []
         keys = self.get_data_keys(False)
         for key in keys:
             if key == 'genres':
-                setattr(self, key, form_data.getlist('genres'))
+                value = form_data.getlist('genres')
+                if ','.join(value) != self._genres:
+                    self.genres = value
+                    changed.append(key)
+                continue
             elif key == 'seeking_venue':
-                setattr(self, key, form_data.get(
-                    'seeking_venue', '') == 'y')
+                value = form_data.get('seeking_venue', '') == 'y'
             else:
-                setattr(self, key, form_data.get(key))
+                value = form_data.get(key)
+            if value != getattr(self, key):
+                setattr(self, key, value)
+                changed.append(key)
+        return changed
+
+    # past shows query with the venue eager loaded, optionally in [start, end)
+    def get_past_shows(self, now=None, start=None, end=None):
+        if now is None:
+            now = datetime.now()
+        return Show.query.options(db.joinedload(Show.venue)).filter(
+            Show.artist_id == self.id, Show.start_time <= now,
+            *Show.get_range_filters(start, end)
+        ).order_by(Show.start_time.desc()).all()
+
+    # upcoming shows query with the venue eager loaded, optionally in [start, end)
+    def get_upcoming_shows(self, now=None, start=None, end=None):
+        if now is None:
+            now = datetime.now()
+        return Show.query.options(db.joinedload(Show.venue)).filter(
+            Show.artist_id == self.id, Show.start_time > now,
+            *Show.get_range_filters(start, end)
+        ).order_by(Show.start_time).all()
 
-    def get_past_shows(self):
-        return list(filter(lambda show: show.start_time <= datetime.now(), self.shows))
+    # ids of venues with shows of this artist
+    def get_venue_ids(self):
+        return [id for id, in db.session.query(Show.venue_id).filter(
+            Show.artist_id == self.id).distinct()]
 
-    def get_upcoming_shows(self):
-        return list(filter(lambda show: show.start_time > datetime.now(), self.shows))
+    # most similar artists, nearest first, in one query on the neighbour table
+    def get_similar(self, limit=None):
+        query = db.session.query(
+            Artist.id, Artist.name, Artist.image_link, artist_neighbors.c.score
+        ).join(artist_neighbors, artist_neighbors.c.neighbor_id == Artist.id).filter(
+            artist_neighbors.c.artist_id == self.id
+        ).order_by(artist_neighbors.c.rank)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    # ids of artists listing the artist as similar, from the neighbour index
+    @staticmethod
+    def get_similar_to_ids(artist_id):
+        return [id for id, in db.session.query(artist_neighbors.c.artist_id).filter(
+            artist_neighbors.c.neighbor_id == artist_id)]
+
+    # deletes the artist in a single statement, its shows & genre tags go with
+    # it through ON DELETE CASCADE, returns the ids of the venues it had
+    # shows with or None when it doesn't exist
+    @classmethod
+    def delete_by_id(cls, artist_id):
+        venue_ids = [id for id, in db.session.query(Show.venue_id).filter(
+            Show.artist_id == artist_id).distinct()]
+        if not db.session.execute(db.delete(cls).where(cls.id == artist_id)).rowcount:
+            return None
+        return venue_ids
+
+    # ids of artists with the genre, resolved through the genre index
+    @staticmethod
+    def get_genre_ids_query(genre):
+        return db.session.query(artist_genres.c.artist_id).join(
+            Genre, Genre.id == artist_genres.c.genre_id
+        ).filter(Genre.name == genre)
 
     def __repr__(self):
         return f'<Artist id: {self.id}, name: {self.name}, city: {self.city}, state: {self.state}>'
 
 
+# partitioned by start_time month on postgresql, see partitions.py
 class Show(db.Model):
     __tablename__ = 'Show'
     # columns
     id = db.Column(db.Integer, primary_key=True)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey(
+        'Venue.id', ondelete='CASCADE'), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey(
-        'Artist.id'), nullable=False)
+        'Artist.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime(), nullable=False)
+    # row version, incremented by every update
+    version = db.Column(db.Integer, nullable=False,
+                        default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+    # indexes
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+    )
+
+    # largest id, so (now, MAX_ID) sorts after every show starting at now
+    MAX_ID = 2147483647
+
+    # encode (start_time, id) page key to url cursor
+    @staticmethod
+    def encode_cursor(key):
+        return f'{key[0].isoformat()}~{key[1]}'
+
+    # decode url cursor to (start_time, id) page key, raises ValueError
+    @staticmethod
+    def decode_cursor(cursor):
+        start_time, id = cursor.split('~')
+        return (datetime.fromisoformat(start_time), int(id))
+
+    # every show books its venue & artist for a fixed slot from start_time
+    DURATION = timedelta(hours=3)
+
+    # serializes bookings of the venue & artist until the transaction ends,
+    # so concurrent checks can't both miss each other's show (postgresql)
+    @staticmethod
+    def lock_booking(venue_id, artist_id):
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(db.text(
+                'SELECT pg_advisory_xact_lock(1, :venue_id), pg_advisory_xact_lock(2, :artist_id)'),
+                {'venue_id': venue_id, 'artist_id': artist_id})
+
+    # whether the venue & artist exist and whether either is booked in a slot
+    # overlapping start_time, in a single query, the overlaps are range scans
+    # of the (venue_id, start_time) & (artist_id, start_time) indexes
+    @classmethod
+    def get_booking_check(cls, venue_id, artist_id, start_time):
+        overlaps = (cls.start_time > start_time - cls.DURATION,
+                    cls.start_time < start_time + cls.DURATION)
+        return db.session.query(
+            db.exists().where(Venue.id == venue_id).label('venue_exists'),
+            db.exists().where(Artist.id == artist_id).label('artist_exists'),
+            db.exists().where(cls.venue_id == venue_id,
+                              *overlaps).label('venue_booked'),
+            db.exists().where(cls.artist_id == artist_id,
+                              *overlaps).label('artist_booked')
+        ).one()._asdict()
+
+    # start_time in [start, end), both optional, served by the start_time index
+    @classmethod
+    def get_range_filters(cls, start=None, end=None):
+        filters = []
+        if start is not None:
+            filters.append(cls.start_time >= start)
+        if end is not None:
+            filters.append(cls.start_time < end)
+        return filters
+
+    # keyset paginated shows on (start_time, id) with venue & artist joined,
+    # optionally in [start, end), default page starts with the upcoming
+    # shows or the range start
+    @classmethod
+    def get_page(cls, after=None, before=None, per_page=20, now=None, start=None, end=None):
+        key = db.tuple_(cls.start_time, cls.id)
+        in_range = cls.get_range_filters(start, end)
+        query = cls.query.options(
+            db.joinedload(cls.venue), db.joinedload(cls.artist)).filter(*in_range)
+
+        if before is not None:
+            # walk backwards then restore ascending order
+            shows = query.filter(key < before).order_by(
+                cls.start_time.desc(), cls.id.desc()).limit(per_page + 1).all()
+            has_prev = len(shows) > per_page
+            shows = shows[:per_page][::-1]
+            has_next = db.session.query(
+                cls.query.filter(key >= before, *in_range).exists()).scalar()
+            boundary = before
+        else:
+            if after is None and start is None:
+                if now is None:
+                    now = datetime.now()
+                after = (now, cls.MAX_ID)
+            if after is not None:
+                query = query.filter(key > after)
+            shows = query.order_by(
+                cls.start_time, cls.id).limit(per_page + 1).all()
+            has_next = len(shows) > per_page
+            shows = shows[:per_page]
+            has_prev = after is not None and db.session.query(
+                cls.query.filter(key <= after, *in_range).exists()).scalar()
+            boundary = after
+
+        prev_cursor = next_cursor = None
+        if has_prev:
+            prev_cursor = cls.encode_cursor(
+                (shows[0].start_time, shows[0].id) if shows else boundary)
+        if has_next:
+            next_cursor = cls.encode_cursor(
+                (shows[-1].start_time, shows[-1].id) if shows else boundary)
+
+        return {
+            "shows": shows,
+            "prev_cursor": prev_cursor,
+            "next_cursor": next_cursor
+        }
 
     def __repr__(self):
         return f'<Show id: {self.id}, venue_id: {self.venue_id}, artist_id: {self.artist_id}, start_time: {self.start_time}>'
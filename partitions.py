@@ -0,0 +1,65 @@
+from datetime import date
+import click
+from flask.cli import with_appcontext
+from models import db
+
+
+# first day of the month, months after the given date's month
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def get_partition_name(month):
+    return f'Show_y{month.year}m{month.month:02d}'
+
+
+def get_partition_names(connection):
+    return {name for name, in connection.execute(db.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'Show'"))}
+
+
+# monthly partition of "Show", rows of the month in the default partition
+# are moved into it, as postgres refuses to attach over them otherwise
+def create_partition(connection, month):
+    name = get_partition_name(month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    connection.execute(db.text(
+        f'CREATE TABLE "{name}" (LIKE "Show" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    connection.execute(db.text(
+        f'WITH moved AS (DELETE FROM "Show_default" WHERE start_time >= :start AND start_time < :end RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'), {'start': start, 'end': end})
+    connection.execute(db.text(
+        f'ALTER TABLE "Show" ATTACH PARTITION "{name}" FOR VALUES FROM (\'{start}\') TO (\'{end}\')'))
+
+
+@click.command('create-show-partitions')
+@click.option('--months', default=12, show_default=True,
+              help='months ahead of the current one to create')
+@with_appcontext
+def create_partitions_command(months):
+    """Create missing monthly Show partitions (PostgreSQL)."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'postgresql':
+        raise click.ClickException('Show is only partitioned on PostgreSQL')
+
+    existing = get_partition_names(connection)
+    if not existing:
+        raise click.ClickException('Show is not partitioned, run flask db upgrade')
+
+    this_month = date.today().replace(day=1)
+    created = []
+    for i in range(months + 1):
+        month = add_months(this_month, i)
+        if get_partition_name(month) not in existing:
+            create_partition(connection, month)
+            created.append(get_partition_name(month))
+    db.session.commit()
+    click.echo(f'created {len(created)} partitions {", ".join(created)}'.strip())
+
+
+def init_app(app):
+    app.cli.add_command(create_partitions_command)
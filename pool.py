@@ -0,0 +1,153 @@
+import threading
+import time
+from flask import current_app, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+from models import db
+
+
+class CheckoutStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.timeouts = 0
+        self.wait_time = 0
+        self.max_wait_time = 0
+
+    def add(self, wait_time, timed_out=False):
+        with self.lock:
+            self.count += 1
+            self.timeouts += timed_out
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "checkouts": self.count,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_time * 1000, 3),
+                "wait_ms_mean": round(self.wait_time * 1000 / self.count, 3) if self.count else 0,
+                "wait_ms_max": round(self.max_wait_time * 1000, 3),
+            }
+
+
+# queue pool timing every checkout, including waits for a free connection
+class MonitoredQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except TimeoutError:
+            self.checkout_stats.add(time.perf_counter() - started_at, True)
+            raise
+        self.checkout_stats.add(time.perf_counter() - started_at)
+        return connection
+
+
+def get_pool_status(pool):
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, MonitoredQueuePool):
+        status.update(pool.checkout_stats.to_dict())
+    return status
+
+
+# a pool with every connection checked out can't serve the check
+def is_saturated(pool):
+    return isinstance(pool, QueuePool) and \
+        pool.checkedout() >= pool.size() + max(pool._max_overflow, 0)
+
+
+class PoolMonitor:
+    def __init__(self, app=None):
+        self.statement_timeout = 0
+        self.pgbouncer = False
+        if app is not None:
+            self.init_app(app)
+
+    # before db.init_app, engines are created with these options
+    def init_app(self, app):
+        self.statement_timeout = app.config.get('SQLALCHEMY_STATEMENT_TIMEOUT_MS', 0)
+        self.pgbouncer = app.config.get('SQLALCHEMY_PGBOUNCER', False)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+            self.get_engine_options(app.config),
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        if not event.contains(Engine, 'begin', self.begin):
+            event.listen(Engine, 'begin', self.begin)
+        app.add_url_rule('/healthz/db', 'healthz_db', self.healthz_view)
+
+    def get_engine_options(self, config):
+        url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+        # in-memory sqlite keeps its single connection pool
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            return {}
+
+        options = {
+            'poolclass': MonitoredQueuePool,
+            'pool_size': config['SQLALCHEMY_POOL_SIZE'],
+            'max_overflow': config['SQLALCHEMY_MAX_OVERFLOW'],
+            'pool_timeout': config['SQLALCHEMY_POOL_TIMEOUT'],
+            'pool_recycle': config['SQLALCHEMY_POOL_RECYCLE'],
+            'pool_pre_ping': config['SQLALCHEMY_POOL_PRE_PING'],
+        }
+        if url.get_backend_name() == 'postgresql':
+            connect_args = {}
+            if self.pgbouncer:
+                # transaction pooling shares server connections, so no
+                # startup options & no server side prepared statements
+                if url.get_driver_name() == 'psycopg':
+                    connect_args['prepare_threshold'] = None
+            elif self.statement_timeout:
+                connect_args['options'] = f'-c statement_timeout={self.statement_timeout}'
+            options['connect_args'] = connect_args
+        return options
+
+    # behind pgbouncer the statement timeout is set for every transaction,
+    # on the dbapi cursor as the transaction is still being started
+    def begin(self, connection):
+        if self.pgbouncer and self.statement_timeout and \
+                connection.dialect.name == 'postgresql':
+            cursor = connection.connection.cursor()
+            cursor.execute(
+                f'SET LOCAL statement_timeout = {int(self.statement_timeout)}')
+            cursor.close()
+
+    def healthz_view(self):
+        engine = db.engine
+        data = {"status": "ok", "pool": get_pool_status(engine.pool)}
+        replica_router = current_app.extensions.get('replica_router')
+        if replica_router is not None and replica_router.engines:
+            data['replicas'] = [get_pool_status(replica.pool)
+                                for replica in replica_router.engines]
+
+        if is_saturated(engine.pool):
+            data['status'] = 'saturated'
+            return jsonify(data), 503
+        started_at = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.exec_driver_sql('SELECT 1')
+        except Exception as error:
+            data['status'] = 'error'
+            data['error'] = str(error)
+            return jsonify(data), 503
+        data['query_ms'] = round((time.perf_counter() - started_at) * 1000, 3)
+        return jsonify(data)
+
+
+pool_monitor = PoolMonitor()
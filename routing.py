@@ -0,0 +1,65 @@
+import random
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.sql.dml import UpdateBase
+
+# methods that never write
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    # reads of requests routed to a replica use its engine, writes &
+    # flushes always go to the primary
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and not self._flushing \
+                and not isinstance(clause, UpdateBase):
+            engine = g.get('replica_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    # sends read-only requests to one of the replica databases, others to
+    # the primary, a client reads from the primary for a short window
+    # after its own write so it sees it
+    def __init__(self, app=None):
+        self.engines = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.engines = [create_engine(uri, **options)
+                        for uri in app.config.get('SQLALCHEMY_REPLICA_URIS', [])]
+        self.sticky_seconds = app.config.get(
+            'SQLALCHEMY_REPLICA_STICKY_SECONDS', 5)
+        app.extensions['replica_router'] = self
+        if self.engines:
+            app.before_request(self.before_request)
+            app.after_request(self.after_request)
+
+    # mark a view safe for replicas whatever its method, e.g. POST searches
+    @staticmethod
+    def read_only(view):
+        view.replica_safe = True
+        return view
+
+    def is_read_only(self):
+        view = current_app.view_functions.get(request.endpoint)
+        return request.method in SAFE_METHODS or getattr(view, 'replica_safe', False)
+
+    def before_request(self):
+        if self.is_read_only() and session.get('primary_until', 0) < time.time():
+            # one replica for the whole request
+            g.replica_engine = random.choice(self.engines)
+
+    def after_request(self, response):
+        if not self.is_read_only():
+            session['primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+
+replica_router = ReplicaRouter()
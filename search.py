@@ -0,0 +1,64 @@
+from models import db, Venue, Artist
+
+
+# searchable text of a venue or artist: name, city, state & genres
+# must match the expression of the pg_trgm GIN indexes (migration 5b8f3d6e2a91)
+def get_search_document(model):
+    space = db.literal_column("' '")
+    return model.name + space + model.city + space + model.state + space + model._genres
+
+
+# escape LIKE wildcards in the search term
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# ranked & paginated case insensitive search with upcoming shows counts
+def search(model, search_term, page=1, per_page=20):
+    query = db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows'),
+        db.func.count().over().label('total')
+    ).filter(
+        get_search_document(model).ilike(
+            '%' + escape_like(search_term) + '%', escape='\\')
+    )
+
+    # rank: postgres trigram similarity, otherwise name prefix matches first
+    if db.engine.dialect.name == 'postgresql':
+        query = query.order_by(
+            db.func.similarity(model.name, search_term).desc(), model.name, model.id)
+    else:
+        prefix_match = model.name.ilike(
+            escape_like(search_term) + '%', escape='\\')
+        query = query.order_by(
+            db.case((prefix_match, 0), else_=1), model.name, model.id)
+
+    rows = query.limit(per_page).offset((page - 1) * per_page).all()
+    if rows:
+        count = rows[0].total
+    elif page > 1:
+        # past the last page, e.g. a stale pager link, no row carries the total
+        count = query.order_by(None).with_entities(db.func.count()).scalar()
+    else:
+        count = 0
+
+    return {
+        "count": count,
+        "page": page,
+        "per_page": per_page,
+        "data": [{
+            "id": row.id,
+            "name": row.name,
+            "num_upcoming_shows": row.num_upcoming_shows
+        } for row in rows]
+    }
+
+
+def search_venues(search_term, page=1, per_page=20):
+    return search(Venue, search_term, page, per_page)
+
+
+def search_artists(search_term, page=1, per_page=20):
+    return search(Artist, search_term, page, per_page)
@@ -0,0 +1,174 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db, Venue, Artist, Show, venue_genres, artist_genres, \
+    venue_neighbors, artist_neighbors
+
+# owner table, its show foreign key, the co-booked side's show foreign key,
+# genre association owner column & neighbour table, per kind
+KINDS = {
+    'venues': (Venue.__table__, Show.__table__.c.venue_id, Show.__table__.c.artist_id,
+               venue_genres.c.venue_id, venue_neighbors),
+    'artists': (Artist.__table__, Show.__table__.c.artist_id, Show.__table__.c.venue_id,
+                artist_genres.c.artist_id, artist_neighbors),
+}
+
+# dense float32 score cells per batch, 64MB
+BATCH_CELLS = 2 ** 24
+
+
+# sparse (owner x column) matrix of (owner id, column id, value) rows, owners
+# in ids order, columns numbered in id order
+def get_matrix(ids, rows):
+    import numpy as np
+    from scipy import sparse
+    if not rows:
+        return sparse.csr_matrix((len(ids), 0), dtype=np.float32)
+    owners, columns, values = (np.array(column) for column in zip(*rows))
+    # rows of owners created after ids were read
+    known = np.isin(owners, ids)
+    column_ids, columns = np.unique(columns[known], return_inverse=True)
+    return sparse.csr_matrix(
+        (values[known].astype(np.float32), (np.searchsorted(ids, owners[known]), columns)),
+        shape=(len(ids), len(column_ids)))
+
+
+# idf weighted & L2 normalized rows, so venues every artist plays (or the
+# most common genres) count less and row products are cosine similarities
+def normalize(matrix, idf=True):
+    import numpy as np
+    from scipy import sparse
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    if idf and matrix.shape[1]:
+        counts = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        matrix = matrix @ sparse.diags(
+            np.log(matrix.shape[0] / np.maximum(counts, 1)).astype(np.float32) + 1)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+# owner ids & feature rows: co-bookings (log scaled show counts with each
+# counterpart) next to genre tags, each block normalized then weighted
+def get_features(connection, kind, genre_weight):
+    import numpy as np
+    from scipy import sparse
+    table, fk, other_fk, genre_owner, _ = KINDS[kind]
+    ids = np.fromiter(connection.execute(
+        db.select(table.c.id).order_by(table.c.id)).scalars(), dtype=np.int64)
+
+    bookings = get_matrix(ids, connection.execute(
+        db.select(fk, other_fk, db.func.count()).group_by(fk, other_fk)).all())
+    bookings.data = np.log1p(bookings.data)
+    genre_id = genre_owner.table.c.genre_id
+    genres = get_matrix(ids, connection.execute(
+        db.select(genre_owner, genre_id, db.literal(1))).all())
+
+    features = sparse.hstack([normalize(bookings), normalize(genres) * genre_weight])
+    return ids, normalize(features, idf=False).tocsr()
+
+
+# top k (column indexes, scores) of the given rows by cosine similarity,
+# nearest first, computed a batch of rows at a time
+def get_neighbors(features, rows, k, batch_size):
+    import numpy as np
+    count = features.shape[0]
+    k = min(k, count - 1)
+    if k <= 0:
+        return
+    transposed = features.T
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        scores = (features[batch] @ transposed).toarray()
+        # not its own neighbour
+        scores[np.arange(len(batch)), batch] = -1
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        yield batch, np.take_along_axis(top, order, axis=1), \
+            np.take_along_axis(top_scores, order, axis=1)
+
+
+# (re)writes the neighbour rows of the given owner ids, all owners when
+# None, returns the number of owners written, each batch is committed so
+# pages keep reading the previous neighbours until theirs are replaced
+def build(kind, ids=None, k=None, batch_size=None, genre_weight=None):
+    import numpy as np
+    config = current_app.config
+    if k is None:
+        k = config['SIMILARITY_NEIGHBORS']
+    if genre_weight is None:
+        genre_weight = config['SIMILARITY_GENRE_WEIGHT']
+    neighbors = KINDS[kind][-1]
+    owner, rank, neighbor_id, score = neighbors.c
+
+    all_ids, features = get_features(db.session.connection(), kind, genre_weight)
+    if ids is None:
+        rows = np.arange(len(all_ids))
+    else:
+        ids = np.array(sorted(ids), dtype=np.int64)
+        rows = np.searchsorted(all_ids, ids[np.isin(ids, all_ids)])
+    if batch_size is None:
+        batch_size = max(1, min(1024, BATCH_CELLS // max(len(all_ids), 1)))
+
+    written = 0
+    for batch, top, top_scores in get_neighbors(features, rows, k, batch_size):
+        values = []
+        for row, columns, row_scores in zip(batch, top, top_scores):
+            # no shared venue, artist or genre, no similarity
+            similar = row_scores > 0
+            columns, row_scores = columns[similar], row_scores[similar]
+            values.extend({
+                owner.key: int(all_ids[row]),
+                rank.key: i,
+                neighbor_id.key: int(all_ids[column]),
+                score.key: round(float(value), 4),
+            } for i, (column, value) in enumerate(zip(columns, row_scores)))
+        connection = db.session.connection()
+        connection.execute(neighbors.delete().where(
+            owner.in_([int(id) for id in all_ids[batch]])))
+        if values:
+            connection.execute(neighbors.insert(), values)
+        db.session.commit()
+        written += len(batch)
+    return written
+
+
+# owners without any neighbour rows yet, e.g. created since the last build
+def get_missing_ids(kind):
+    table, neighbors = KINDS[kind][0], KINDS[kind][-1]
+    owner = neighbors.c[0]
+    return db.session.execute(db.select(table.c.id).where(
+        ~db.exists().where(owner == table.c.id))).scalars().all()
+
+
+@click.command('build-similarity')
+@click.argument('kinds', nargs=-1, type=click.Choice(list(KINDS)))
+@click.option('--neighbors', 'k', type=int, help='neighbours kept per row, defaults to SIMILARITY_NEIGHBORS')
+@click.option('--batch-size', type=int, help='rows scored per batch, sized to memory by default')
+@click.option('--missing', is_flag=True, help='only rows without neighbours yet')
+@click.option('--id', 'ids', type=int, multiple=True, help='only these rows, with a single kind')
+@with_appcontext
+def build_command(kinds, k, batch_size, missing, ids):
+    """Build similar venue & artist neighbour tables (needs numpy & scipy)."""
+    try:
+        import numpy  # noqa: F401
+        import scipy  # noqa: F401
+    except ImportError:
+        raise click.ClickException('numpy and scipy are required: pip install numpy scipy')
+    if ids and len(kinds) != 1:
+        raise click.ClickException('--id needs a single kind')
+
+    for kind in kinds or list(KINDS):
+        kind_ids = list(ids) if ids else None
+        if missing:
+            kind_ids = [id for id in get_missing_ids(kind) if not ids or id in ids]
+            if not kind_ids:
+                click.echo(f'{kind}: none missing')
+                continue
+        count = build(kind, kind_ids, k, batch_size)
+        click.echo(f'{kind}: neighbours of {count} rows written')
+
+
+def init_app(app):
+    app.cli.add_command(build_command)
@@ -2,3 +2,29 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// type-ahead for search inputs with data-autocomplete="venue|artist"
+document.addEventListener('DOMContentLoaded', function () {
+  var inputs = document.querySelectorAll('input[data-autocomplete]');
+  Array.prototype.forEach.call(inputs, function (input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    input.addEventListener('input', function () {
+      var query = this.value;
+      fetch('/api/autocomplete?type=' + input.dataset.autocomplete +
+        '&q=' + encodeURIComponent(query)).then(function (response) {
+        return response.json();
+      }).then(function (jsonResponse) {
+        // ignore responses for stale input
+        if (input.value !== query) {
+          return;
+        }
+        list.innerHTML = '';
+        jsonResponse.data.forEach(function (result) {
+          var option = document.createElement('option');
+          option.value = result.name;
+          list.appendChild(option);
+        });
+      });
+    });
+  });
+});
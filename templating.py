@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import BytecodeCache, FileSystemBytecodeCache
+
+
+# bytecode cache in a dict, for a single process
+class MemoryBytecodeCache(BytecodeCache):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def load_bytecode(self, bucket):
+        with self.lock:
+            code = self.data.get(bucket.key)
+        if code is not None:
+            bucket.bytecode_from_string(code)
+
+    def dump_bytecode(self, bucket):
+        with self.lock:
+            self.data[bucket.key] = bucket.bytecode_to_string()
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+def get_bytecode_cache(app):
+    backend = app.config['JINJA_BYTECODE_CACHE']
+    if backend == 'filesystem':
+        directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        return FileSystemBytecodeCache(directory)
+    elif backend == 'memory':
+        return MemoryBytecodeCache()
+    elif backend == 'null':
+        return None
+    raise ValueError(f'unknown JINJA_BYTECODE_CACHE {backend!r}')
+
+
+@click.command('precompile-templates')
+@with_appcontext
+def precompile_templates_command():
+    """Compile every template into the bytecode cache."""
+    env = current_app.jinja_env
+    if env.bytecode_cache is None:
+        raise click.ClickException('JINJA_BYTECODE_CACHE is disabled')
+
+    started = time.perf_counter()
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    click.echo(f'compiled {len(names)} templates in '
+               f'{time.perf_counter() - started:.2f}s')
+
+
+def init_app(app):
+    app.jinja_env.bytecode_cache = get_bytecode_cache(app)
+    app.cli.add_command(precompile_templates_command)
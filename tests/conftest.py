@@ -0,0 +1,29 @@
+import pytest
+import config
+from app import create_app
+from models import db
+
+# app config on an in-memory sqlite database, without the page cache & csrf
+TestConfig = type('TestConfig', (), dict(
+    {key: value for key, value in vars(config).items() if key.isupper()},
+    TESTING=True,
+    SQLALCHEMY_DATABASE_URI='sqlite://',
+    PAGE_CACHE_BACKEND='null',
+    JINJA_BYTECODE_CACHE='null',
+    WTF_CSRF_ENABLED=False,
+))
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
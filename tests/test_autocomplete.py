@@ -0,0 +1,28 @@
+from autocomplete import PrefixIndex
+
+
+def test_lookup_by_word_prefix():
+    index = PrefixIndex(lambda: [(1, 'The Blue Note'), (2, 'Bluebird Cafe')])
+    index.build()
+    assert index.lookup('blue') == [
+        {"id": 1, "name": "The Blue Note"}, {"id": 2, "name": "Bluebird Cafe"}]
+    assert index.lookup('NOTE') == [{"id": 1, "name": "The Blue Note"}]
+
+
+def test_changes_during_a_build_are_kept():
+    index = PrefixIndex(lambda: [(1, 'Old Name'), (2, 'Removed')])
+    index.build()
+
+    # rows loaded before these writes committed
+    def load():
+        index.add(3, 'Created Venue')
+        index.add(1, 'New Name')
+        index.remove(2)
+        return [(1, 'Old Name'), (2, 'Removed')]
+    index.load = load
+    index.build()
+
+    assert index.lookup('created') == [{"id": 3, "name": "Created Venue"}]
+    assert index.lookup('new') == [{"id": 1, "name": "New Name"}]
+    assert index.lookup('old') == []
+    assert index.lookup('removed') == []
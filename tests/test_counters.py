@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from cache import page_cache
+from models import db, Venue, Artist, Show
+
+
+def test_rollover_moves_started_shows_and_invalidates_pages(app):
+    app.config['PAGE_CACHE_BACKEND'] = 'memory'
+    page_cache.init_app(app)
+    start_time = datetime.now() - timedelta(hours=1)
+    venue = Venue(name='Venue', city='Austin', state='TX',
+                  image_link='https://example.com/venue.jpg', _genres='Jazz')
+    artist = Artist(name='Artist', city='Austin', state='TX',
+                    image_link='https://example.com/artist.jpg', _genres='Jazz')
+    db.session.add(Show(venue=venue, artist=artist, start_time=start_time))
+    db.session.commit()
+    # counters as they were before the show started
+    for owner in (venue, artist):
+        owner.upcoming_shows_count, owner.past_shows_count = 1, 0
+        owner.next_show_time = start_time
+    db.session.commit()
+    namespaces = ['venues', 'artists', f'venue:{venue.id}', f'artist:{artist.id}']
+    versions = [page_cache.get_version(namespace) for namespace in namespaces]
+
+    result = app.test_cli_runner().invoke(args=['rollover-shows'])
+    assert result.exit_code == 0, result.output
+    assert 'rolled over 1 venues & 1 artists' in result.output
+
+    db.session.expire_all()
+    for owner in (venue, artist):
+        assert (owner.upcoming_shows_count, owner.past_shows_count) == (0, 1)
+        assert owner.next_show_time is None
+    for namespace, version in zip(namespaces, versions):
+        assert page_cache.get_version(namespace) != version
@@ -0,0 +1,44 @@
+from datetime import datetime
+from models import db, Venue, Artist, Show
+
+
+def add_show(start_time):
+    venue = Venue(name='Venue', city='Austin', state='TX',
+                  image_link='https://example.com/venue.jpg', _genres='Jazz')
+    artist = Artist(name='Artist', city='Austin', state='TX',
+                    image_link='https://example.com/artist.jpg', _genres='Jazz')
+    db.session.add(Show(venue=venue, artist=artist, start_time=start_time))
+    db.session.commit()
+    return venue.id, artist.id
+
+
+def count_shows():
+    return db.session.scalar(db.select(db.func.count()).select_from(Show))
+
+
+def post_show(client, venue_id, artist_id, start_time):
+    return client.post('/shows/create', data={
+        'venue_id': str(venue_id), 'artist_id': str(artist_id),
+        'start_time': start_time})
+
+
+def test_overlapping_booking_is_rejected(client):
+    venue_id, artist_id = add_show(datetime(2030, 6, 1, 20))
+    html = post_show(client, venue_id, artist_id, '2030-06-01 21:00').get_data(as_text=True)
+    assert 'Venue is already booked at this time.' in html
+    assert 'Artist is already booked at this time.' in html
+    assert count_shows() == 1
+
+
+def test_booking_after_the_show_is_listed(client):
+    venue_id, artist_id = add_show(datetime(2030, 6, 1, 20))
+    html = post_show(client, venue_id, artist_id, '2030-06-01 23:00').get_data(as_text=True)
+    assert 'Show was successfully listed!' in html
+    assert count_shows() == 2
+
+
+def test_unknown_venue_is_rejected(client):
+    venue_id, artist_id = add_show(datetime(2030, 6, 1, 20))
+    html = post_show(client, venue_id + 1, artist_id, '2030-06-02 20:00').get_data(as_text=True)
+    assert 'Venue does not exist.' in html
+    assert count_shows() == 1
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from cache import page_cache
+from models import db, Venue, Artist, Show, artist_neighbors
+
+
+def add_artist(name):
+    artist = Artist(name=name, city='Austin', state='TX',
+                    image_link='https://example.com/artist.jpg', _genres='Jazz')
+    db.session.add(artist)
+    return artist
+
+
+def test_delete_artist_refreshes_cached_pages(app, client):
+    app.config['PAGE_CACHE_BACKEND'] = 'memory'
+    page_cache.init_app(app)
+    venue = Venue(name='Venue', city='Austin', state='TX',
+                  image_link='https://example.com/venue.jpg', _genres='Jazz')
+    artist, other = add_artist('Deleted Artist'), add_artist('Other Artist')
+    db.session.add(Show(venue=venue, artist=artist,
+                        start_time=datetime.now() + timedelta(days=1)))
+    db.session.flush()
+    db.session.execute(artist_neighbors.insert().values(
+        artist_id=other.id, rank=0, neighbor_id=artist.id, score=0.5))
+    db.session.commit()
+    venue_id, artist_id, other_id = venue.id, artist.id, other.id
+    db.session.remove()
+
+    # cached with the artist's upcoming show & as a similar artist
+    venues_version = page_cache.get_version('venues')
+    assert 'Deleted Artist' in client.get(f'/venues/{venue_id}').get_data(as_text=True)
+    assert 'Deleted Artist' in client.get(f'/artists/{other_id}').get_data(as_text=True)
+
+    assert client.delete(f'/artists/{artist_id}').status_code == 200
+    # the venues listing has the venues' upcoming show counts
+    assert page_cache.get_version('venues') != venues_version
+    assert 'Deleted Artist' not in client.get(f'/venues/{venue_id}').get_data(as_text=True)
+    assert 'Deleted Artist' not in client.get(f'/artists/{other_id}').get_data(as_text=True)
+    assert client.get(f'/artists/{artist_id}').status_code == 404
+
+
+def test_missing_pages_are_404(client):
+    for path in ['/venues/1', '/artists/1', '/venues/1/edit', '/artists/1/edit']:
+        assert client.get(path).status_code == 404
+    assert client.delete('/artists/1').status_code == 404
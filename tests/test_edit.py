@@ -0,0 +1,54 @@
+from models import db, Venue, Artist
+
+
+def add_venue():
+    venue = Venue(name='Venue', city='Austin', state='TX', address='1 Main St',
+                  image_link='https://example.com/venue.jpg', _genres='Jazz')
+    db.session.add(venue)
+    db.session.commit()
+    return venue.id
+
+
+def add_artist():
+    artist = Artist(name='Artist', city='Austin', state='TX',
+                    image_link='https://example.com/artist.jpg', _genres='Jazz')
+    db.session.add(artist)
+    db.session.commit()
+    return artist.id
+
+
+def form_data(name, version, **data):
+    return dict(data, name=name, city='Austin', state='TX', genres='Jazz',
+                image_link='https://example.com/image.jpg', version=str(version))
+
+
+def test_edit_venue_with_stale_version_is_409(client):
+    venue_id = add_venue()
+    response = client.post(f'/venues/{venue_id}/edit',
+                           data=form_data('Renamed', 1, address='1 Main St'))
+    assert response.status_code == 302
+    assert db.session.get(Venue, venue_id).version == 2
+
+    # a second edit from a form loaded before the first one was saved
+    response = client.post(f'/venues/{venue_id}/edit',
+                           data=form_data('Stale', 1, address='1 Main St'))
+    assert response.status_code == 409
+    html = response.get_data(as_text=True)
+    assert 'Venue was changed by someone else' in html
+    assert 'Renamed' in html
+    db.session.expire_all()
+    venue = db.session.get(Venue, venue_id)
+    assert (venue.name, venue.version) == ('Renamed', 2)
+
+
+def test_edit_artist_with_stale_version_is_409(client):
+    artist_id = add_artist()
+    response = client.post(f'/artists/{artist_id}/edit', data=form_data('Renamed', 1))
+    assert response.status_code == 302
+
+    response = client.post(f'/artists/{artist_id}/edit', data=form_data('Stale', 1))
+    assert response.status_code == 409
+    assert 'Artist was changed by someone else' in response.get_data(as_text=True)
+    db.session.expire_all()
+    artist = db.session.get(Artist, artist_id)
+    assert (artist.name, artist.version) == ('Renamed', 2)
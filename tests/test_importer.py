@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+from models import db, Venue, Artist, Show
+
+
+def add_venue_and_artists():
+    venue = Venue(name='Venue', city='Austin', state='TX',
+                  image_link='https://example.com/venue.jpg', _genres='Jazz')
+    artists = [Artist(name=f'Artist {i}', city='Austin', state='TX',
+                      image_link='https://example.com/artist.jpg', _genres='Jazz')
+               for i in range(3)]
+    db.session.add(Show(venue=venue, artist=artists[0], start_time=datetime(2031, 2, 1, 20)))
+    db.session.add_all(artists)
+    db.session.commit()
+    return venue.id, [artist.id for artist in artists]
+
+
+# runs flask import, returns the rejected rows by line
+def run_import(app, tmp_path, kind, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    result = app.test_cli_runner().invoke(args=['import', kind, str(path)])
+    assert result.exit_code == 0, result.output
+    errors_path = tmp_path / (name + '.errors.ndjson')
+    if not errors_path.exists():
+        return {}
+    return {row['line']: row['errors']
+            for row in map(json.loads, errors_path.read_text().splitlines())}
+
+
+def test_import_shows_rejects_double_bookings_and_bad_ids(app, tmp_path):
+    venue_id, artist_ids = add_venue_and_artists()
+    rejected = run_import(app, tmp_path, 'shows', 'shows.csv', '\n'.join([
+        'venue_id,artist_id,start_time',
+        # overlaps the existing show at the venue
+        f'{venue_id},{artist_ids[1]},2031-02-01 22:00',
+        f'{venue_id},{artist_ids[1]},2031-03-01 20:00',
+        # overlaps the previous row's artist
+        f'{venue_id},{artist_ids[1]},2031-03-01 21:00',
+        f'abc,{artist_ids[2]},2031-04-01 20:00',
+    ]) + '\n')
+
+    assert rejected == {
+        2: {'venue_id': ['Venue is already booked at this time.']},
+        4: {'venue_id': ['Venue is already booked at this time.'],
+            'artist_id': ['Artist is already booked at this time.']},
+        5: {'venue_id': ['Must be a number.']},
+    }
+    assert Show.query.count() == 2
+
+
+def test_import_rejects_malformed_ndjson_lines(app, tmp_path):
+    rejected = run_import(app, tmp_path, 'venues', 'venues.ndjson', '\n'.join([
+        '{bad json',
+        json.dumps({'name': 'Imported', 'city': 'Austin', 'state': 'TX',
+                    'image_link': 'https://example.com/venue.jpg', 'genres': ['Jazz']}),
+        '[1]',
+    ]) + '\n')
+
+    assert list(rejected) == [1, 3]
+    assert [venue.name for venue in Venue.query.all()] == ['Imported']
@@ -0,0 +1,32 @@
+from models import db, Venue
+import search
+
+
+def add_venues(count):
+    db.session.add_all(Venue(name=f'Blue Note {i}', city='Austin', state='TX',
+                             image_link='https://example.com/venue.jpg', _genres='Jazz')
+                       for i in range(count))
+    db.session.commit()
+
+
+def test_search_pages(app):
+    add_venues(5)
+    first = search.search_venues('blue', page=1, per_page=2)
+    last = search.search_venues('blue', page=3, per_page=2)
+    assert (first['count'], len(first['data'])) == (5, 2)
+    assert (last['count'], len(last['data'])) == (5, 1)
+
+
+def test_search_page_past_the_end_keeps_the_count(app):
+    add_venues(5)
+    response = search.search_venues('blue', page=4, per_page=2)
+    assert response['count'] == 5
+    assert response['data'] == []
+    assert search.search_venues('red', page=2)['count'] == 0
+
+
+def test_search_pager_keeps_per_page(client):
+    add_venues(5)
+    html = client.post('/venues/search', data={
+        'search_term': 'blue', 'page': 2, 'per_page': 2}).get_data(as_text=True)
+    assert html.count('name="per_page" value="2"') == 2
@@ -0,0 +1,32 @@
+from datetime import datetime
+from models import db, Venue, Artist, Show
+
+
+def add_shows(*start_times):
+    venue = Venue(name='Venue', city='Austin', state='TX',
+                  image_link='https://example.com/venue.jpg', _genres='Jazz')
+    for i, start_time in enumerate(start_times):
+        artist = Artist(name=f'Artist {i}', city='Austin', state='TX',
+                        image_link='https://example.com/artist.jpg', _genres='Jazz')
+        db.session.add(Show(venue=venue, artist=artist, start_time=start_time))
+    db.session.commit()
+
+
+def test_shows_to_date_includes_the_whole_day(client):
+    add_shows(datetime(2030, 6, 1, 20), datetime(2030, 6, 2, 23, 30),
+              datetime(2030, 6, 3, 0, 0))
+    html = client.get('/shows?from=2030-06-01&to=2030-06-02').get_data(as_text=True)
+    assert 'Artist 0' in html
+    assert 'Artist 1' in html
+    assert 'Artist 2' not in html
+
+
+def test_shows_to_datetime_is_exclusive(client):
+    add_shows(datetime(2030, 6, 2, 20), datetime(2030, 6, 2, 22))
+    html = client.get('/shows?from=2030-06-01&to=2030-06-02T22:00').get_data(as_text=True)
+    assert 'Artist 0' in html
+    assert 'Artist 1' not in html
+
+
+def test_shows_bad_time_range_is_400(client):
+    assert client.get('/shows?to=june').status_code == 400
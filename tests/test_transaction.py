@@ -0,0 +1,58 @@
+import pytest
+from werkzeug.exceptions import NotFound
+from models import db, Venue
+from transaction import Transaction
+
+
+def add_venue(name='Venue'):
+    db.session.add(Venue(name=name, city='Austin', state='TX',
+                         image_link='https://example.com/venue.jpg', _genres='Jazz'))
+
+
+def count_venues():
+    return db.session.scalar(db.select(db.func.count()).select_from(Venue))
+
+
+def test_commits_then_runs_callbacks(app):
+    calls = []
+    with Transaction() as transaction:
+        add_venue()
+        transaction.on_commit(calls.append, 'committed')
+    assert not transaction.failed
+    assert calls == ['committed']
+    assert count_venues() == 1
+
+
+def test_error_rolls_back_and_skips_callbacks(app):
+    calls = []
+    error = ValueError('boom')
+    with Transaction(expected=ValueError) as transaction:
+        add_venue()
+        db.session.flush()
+        transaction.on_commit(calls.append, 'committed')
+        raise error
+    assert transaction.failed
+    assert transaction.error is error
+    assert calls == []
+    assert count_venues() == 0
+
+
+def test_commit_error_rolls_back_and_skips_callbacks(app):
+    calls = []
+    with Transaction() as transaction:
+        # name is not nullable
+        add_venue(name=None)
+        transaction.on_commit(calls.append, 'committed')
+    assert transaction.failed
+    assert calls == []
+    assert count_venues() == 0
+
+
+def test_http_exceptions_propagate(app):
+    with pytest.raises(NotFound):
+        with Transaction() as transaction:
+            add_venue()
+            db.session.flush()
+            raise NotFound()
+    assert not transaction.failed
+    assert count_venues() == 0
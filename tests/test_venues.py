@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models import db, Venue, Artist, Show
+
+
+# venues in 10 areas with an upcoming and a past show each
+def add_venues(count):
+    artist = Artist(name='Artist', city='Austin', state='TX',
+                    image_link='https://example.com/artist.jpg', _genres='Jazz')
+    db.session.add(artist)
+    now = datetime.now()
+    for i in range(count):
+        venue = Venue(name=f'Venue {i}', city=f'City {i % 10}', state='TX',
+                      image_link='https://example.com/venue.jpg', _genres='Jazz')
+        venue.shows = [
+            Show(artist=artist, start_time=now + timedelta(days=1)),
+            Show(artist=artist, start_time=now - timedelta(days=1)),
+        ]
+        db.session.add(venue)
+    db.session.commit()
+
+
+# SQL statements run by a GET of the path
+def count_statements(app, path):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = app.test_client().get(path)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_venues_statements_do_not_grow_with_venues(app):
+    add_venues(10)
+    small = count_statements(app, '/venues')
+    add_venues(90)
+    assert Venue.query.count() == 100
+    assert count_statements(app, '/venues') == small
+
+
+def test_venues_lists_upcoming_shows_per_area(app):
+    add_venues(20)
+    areas = Venue.get_areas()
+    assert len(areas) == 10
+    assert sum(len(area['venues']) for area in areas) == 20
+    assert all(venue['num_upcoming_shows'] == 1
+               for area in areas for venue in area['venues'])
@@ -0,0 +1,59 @@
+from flask import current_app
+from werkzeug.exceptions import HTTPException
+from models import db
+
+
+# unit of work around db.session for a request handler: writes queued in
+# the block are flushed once by the commit, on_commit callbacks run after it,
+# failures are rolled back & logged, and the session is closed on the way out
+# so its connection goes back to the pool before the response is rendered.
+# Expected exception types aren't logged, HTTP exceptions (abort) propagate.
+class Transaction:
+    def __init__(self, expected=()):
+        self.expected = expected
+        self.callbacks = []
+        self.error = None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    # run after a successful commit, e.g. cache invalidation
+    def on_commit(self, callback, *args, **kwargs):
+        self.callbacks.append((callback, args, kwargs))
+
+    def __enter__(self):
+        self.no_autoflush = db.session.no_autoflush
+        self.no_autoflush.__enter__()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        try:
+            self.no_autoflush.__exit__(type, value, traceback)
+            if type is None:
+                try:
+                    db.session.commit()
+                except Exception as error:
+                    db.session.rollback()
+                    return self.fail(error)
+                for callback, args, kwargs in self.callbacks:
+                    try:
+                        callback(*args, **kwargs)
+                    except Exception:
+                        current_app.logger.exception(
+                            'after commit callback %r failed', callback)
+                return False
+
+            db.session.rollback()
+            if not issubclass(type, Exception) or issubclass(type, HTTPException):
+                return False
+            return self.fail(value)
+        finally:
+            db.session.close()
+
+    def fail(self, error):
+        self.error = error
+        if not isinstance(error, self.expected):
+            current_app.logger.error(
+                'transaction failed', exc_info=(type(error), error, error.__traceback__))
+        return True